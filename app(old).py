@@ -5,6 +5,8 @@ import io
 import docx # python-docx
 import pdfplumber
 
+from quiz_engine.underline import UnderlineIndex
+
 # --- PHẦN 1: HÀM XỬ LÝ LOGIC ---
 
 def is_line_under_word(word_bbox, line_bbox):
@@ -41,11 +43,13 @@ def is_line_under_word(word_bbox, line_bbox):
 def extract_text_from_pdf(file):
     """
     Dùng pdfplumber đọc text và phát hiện gạch chân (Line/Rect)
+    Bản cũ: giữ nguyên đầu ra dạng chuỗi (không dùng LineRecord như quiz_engine.pdf_extract)
+    - cách ghép từ/dòng ở đây khác join_lines, đổi sang record sẽ làm đổi text của app cũ.
     """
     debug_logs = [] # Lưu log để in ra màn hình nếu cần
     
     try:
-        full_text = ""
+        page_texts = []  # ghép 1 lần ở cuối, không cộng chuỗi
         with pdfplumber.open(file) as pdf:
             for page_num, page in enumerate(pdf.pages):
                 # 1. Lấy danh sách Candidates (Lines/Rects)
@@ -62,11 +66,14 @@ def extract_text_from_pdf(file):
                     if abs(rect['bottom'] - rect['top']) < 10: 
                         candidates.append((rect['x0'], rect['top'], rect['x1'], rect['bottom']))
 
+                # Dựng chỉ mục theo Y 1 lần cho cả trang
+                underline_index = UnderlineIndex(candidates)
+
                 # 2. Extract Words
                 words = page.extract_words(keep_blank_chars=True)
                 words.sort(key=lambda w: (w['top'], w['x0']))
                 
-                page_output = ""
+                page_parts = []
                 current_top = 0
                 if words: current_top = words[0]['top']
 
@@ -75,7 +82,7 @@ def extract_text_from_pdf(file):
                     clean_text = text.strip()
                     
                     if not clean_text:
-                        page_output += text
+                        if text: page_parts.append(text)
                         continue
 
                     # --- XỬ LÝ LATEX (Trường hợp file chứa code ẩn) ---
@@ -95,7 +102,8 @@ def extract_text_from_pdf(file):
                         w_bbox = (word['x0'], word['top'], word['x1'], word['bottom'])
                         is_underlined = False
                         
-                        for line_bbox in candidates:
+                        # Chỉ xét các line nằm trong dải dọc của từ
+                        for line_bbox in underline_index.candidates(w_bbox):
                             if is_line_under_word(w_bbox, line_bbox):
                                 is_underlined = True
                                 # Ghi log debug cho trang đầu tiên để kiểm tra
@@ -113,16 +121,17 @@ def extract_text_from_pdf(file):
 
                     # Logic ghép câu
                     if abs(word['top'] - current_top) > 8: 
-                        page_output += "\n"
+                        page_parts.append("\n")
                         current_top = word['top']
-                    elif page_output and not page_output.endswith(('\n', ' ')):
-                        page_output += " "
+                    elif page_parts and not page_parts[-1].endswith(('\n', ' ')):
+                        page_parts.append(" ")
                         
-                    page_output += text
+                    page_parts.append(text)
                     
-                full_text += page_output + "\n"
+                page_parts.append("\n")
+                page_texts.append("".join(page_parts))
         
-        return full_text, debug_logs
+        return "".join(page_texts), debug_logs
     except Exception as e:
         import traceback
         return f"Error: {str(e)}\n{traceback.format_exc()}", []
@@ -0,0 +1,69 @@
+"""
+Benchmark: render HTML (template/index.jinja2) cho K mã đề của cùng 1 ngân hàng có ảnh.
+So sánh: dựng Environment + đọc/mã hóa ảnh lại mỗi lần (như trước) vs HtmlRenderContext dùng chung
+(template biên dịch 1 lần, data URI ảnh nhớ theo nội dung).
+
+Chạy từ root:
+    python bench/bench_html.py --versions 50 --questions 100
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_exam
+from quiz_engine.html_template import TEMPLATE_DIR, TEMPLATE_NAME, HtmlRenderContext
+from quiz_engine.mixer import mix_exam_data
+
+
+def render_old(questions, img_dir):
+    from jinja2 import Environment, FileSystemLoader
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+    for q in questions:
+        q["image_abspaths"] = []
+        for name in q["images"]:
+            with open(os.path.join(img_dir, name), "rb") as f:
+                q["image_abspaths"].append("data:image/png;base64," + base64.b64encode(f.read()).decode("ascii"))
+    return env.get_template(TEMPLATE_NAME).render(questions=questions)
+
+
+def render_new(ctx, questions, img_dir):
+    for q in questions:
+        q["image_abspaths"] = [ctx.data_uri(os.path.join(img_dir, name)) for name in q["images"]]
+    return ctx.render(questions)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--versions", type=int, default=50)
+    ap.add_argument("--questions", type=int, default=100)
+    args = ap.parse_args()
+
+    questions, images = make_exam(args.questions, images_per_question=0.5, seed=1)
+    versions = [mix_exam_data(questions, seed=i) for i in range(args.versions)]
+    with tempfile.TemporaryDirectory() as img_dir:
+        for name, data in images.items():
+            with open(os.path.join(img_dir, name), "wb") as f:
+                f.write(data)
+
+        t0 = time.perf_counter()
+        old = [render_old(v, img_dir) for v in versions]
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ctx = HtmlRenderContext(cache_dir=os.path.join(img_dir, "jinja"))
+        new = [render_new(ctx, v, img_dir) for v in versions]
+        t_new = time.perf_counter() - t0
+
+    assert old == new, "HTML khác nhau giữa 2 cách render"
+    print(f"{args.versions} mã đề x {args.questions} câu ({len(images)} ảnh khác nhau)")
+    print(f"dựng lại mỗi lần : {t_old * 1000:8.1f} ms ({t_old / args.versions * 1000:6.2f} ms/đề)")
+    print(f"ngữ cảnh dùng chung: {t_new * 1000:8.1f} ms ({t_new / args.versions * 1000:6.2f} ms/đề) | x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
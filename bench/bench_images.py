@@ -0,0 +1,94 @@
+"""
+Benchmark: gán ảnh vào câu hỏi trên các trang nhiều hình (ngân hàng hình vẽ 30+ ảnh/trang).
+So sánh quét list + remove (cách cũ) với quét theo đáy ảnh đã sort (iter_merged_lines).
+
+Chạy từ root:
+    python bench/bench_images.py --pages 200 --images 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine.lines import LineRecord
+from quiz_engine.pdf_extract import iter_merged_lines
+
+
+def merge_images_old(page_results, load_image):
+    """Bản cũ: mỗi dòng copy + duyệt toàn bộ ảnh chờ, gán xong thì remove"""
+    img_map = {}
+    current_q_id = 0
+    pending_images = []
+    for page_res in page_results:
+        pending_images = list(page_res["images"])
+        for rec in page_res["lines"]:
+            if rec.q_id is not None:
+                current_q_id = rec.q_id
+            images_to_assign = []
+            for img in pending_images[:]:
+                if img[1] <= (rec.y + 30):
+                    if current_q_id > 0:
+                        images_to_assign.append(img)
+                        pending_images.remove(img)
+            for xref, _ in images_to_assign:
+                img_map.setdefault(current_q_id, []).append(load_image(xref))
+    if pending_images and current_q_id > 0:
+        for xref, _ in pending_images:
+            img_map.setdefault(current_q_id, []).append(load_image(xref))
+    return img_map
+
+
+def make_pages(n_pages, n_images, lines_per_page=60, seed=0):
+    """Trang A4 (~800pt): dòng cách đều, cứ ~5 dòng 1 câu hỏi, ảnh rải khắp trang"""
+    rnd = random.Random(seed)
+    pages = []
+    q_id = 0
+    xref = 0
+    for pno in range(n_pages):
+        lines = []
+        for i in range(lines_per_page):
+            new_q = rnd.random() < 0.2
+            if new_q:
+                q_id += 1
+            lines.append(LineRecord(pno, 40 + i * 12.5, 0, "...", q_id if new_q else None))
+        images = []
+        for _ in range(n_images):
+            xref += 1
+            top = rnd.uniform(30, 760)
+            images.append((xref, top + rnd.uniform(21, 120), top))
+        images.sort(key=lambda img: img[2])
+        pages.append({"lines": lines, "images": [(x, bottom) for x, bottom, _ in images]})
+    return pages
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--images", type=int, nargs="*", default=[5, 40, 120], help="số ảnh mỗi trang")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n_images in args.images:
+        pages = make_pages(args.pages, n_images)
+        t_old = t_new = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            res_old = merge_images_old(pages, int)
+            t_old = min(t_old, time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            res_new, stats = {}, []
+            for _ in iter_merged_lines(pages, int, res_new, stats):
+                pass
+            t_new = min(t_new, time.perf_counter() - t0)
+        assert res_old == res_new, "Kết quả 2 cách khác nhau!"
+        leftover = sum(s["leftover"] for s in stats)
+        print(f"pages={args.pages} images/page={n_images:>4} | old {t_old * 1000:8.1f} ms | "
+              f"new {t_new * 1000:8.1f} ms | x{t_old / t_new:.1f} | ảnh bị bỏ: {leftover}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark thời gian import (python -X importtime) + chốt chặn hồi quy:
+các module lõi nhẹ (parser, trộn đề, batch, ...) KHÔNG được kéo theo
+Streamlit / PyMuPDF / reportlab / python-docx / Pillow / NumPy lúc import.
+
+Chạy từ root:
+    python bench/bench_import.py           # in bảng
+    python bench/bench_import.py --check   # exit 1 nếu module nhẹ import thư viện nặng
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("streamlit", "fitz", "pymupdf", "reportlab", "docx", "PIL", "numpy", "playwright", "jinja2")
+
+# Module phải import được mà không nạp thư viện nặng nào
+LIGHT_MODULES = [
+    "quiz_engine.parser",
+    "quiz_engine.pdf_extract",
+    "quiz_engine.docx_extract",
+    "quiz_engine.cache",
+    "quiz_engine.export",
+    "quiz_engine.lines",
+    "quiz_engine.stream",
+    "quiz_engine.memory",
+    "quiz_engine.profiling",
+    "quiz_engine.mixer",
+    "quiz_engine.versions",
+    "quiz_engine.batch",
+    "quiz_engine.html_pdf",
+    "quiz_engine.html_template",
+]
+# Chỉ để so sánh (chi phí nếu lỡ import lúc khởi động)
+REFERENCE_MODULES = ["quiz_engine.render_pdf", "quiz_engine.render_word", "fitz", "streamlit"]
+
+
+def import_profile(module):
+    """Trả về (tổng µs của module, tập gói gốc đã import) hoặc (None, lỗi)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1:]
+    total = 0
+    roots = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:  # dòng tiêu đề
+            continue
+        name = parts[2].strip()
+        roots.add(name.split(".")[0])
+        if name == module:
+            total = cumulative
+    return total, roots
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--check", action="store_true", help="exit 1 nếu module nhẹ import thư viện nặng")
+    args = ap.parse_args()
+
+    failed = []
+    print(f"{'module':<28} {'import (ms)':>12}  thư viện nặng bị kéo theo")
+    for module in LIGHT_MODULES + REFERENCE_MODULES:
+        total, roots = import_profile(module)
+        if total is None:
+            print(f"{module:<28} {'lỗi':>12}  {roots}")
+            continue
+        heavy = sorted(r for r in roots if r in HEAVY)
+        print(f"{module:<28} {total / 1000:>12.1f}  {', '.join(heavy) or '-'}")
+        if module in LIGHT_MODULES and heavy:
+            failed.append((module, heavy))
+
+    if failed:
+        print("\n❌ Module nhẹ đang import thư viện nặng:")
+        for module, heavy in failed:
+            print(f"   {module}: {', '.join(heavy)}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print("\n✅ Các module lõi không kéo theo thư viện nặng khi import.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: gom dòng + lề trái + thụt đầu dòng trên trang dày chữ.
+So sánh group_lines (Python thuần) với group_lines_numpy.
+
+Chạy từ root:
+    python bench/bench_layout.py --words 500 2000 3000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine.layout import HAS_NUMPY, group_lines, group_lines_numpy
+
+
+def make_words(n_words, seed=0):
+    """Tuple giống page.get_text("words"): dòng cách nhau 14px, ~12 từ/dòng, lề 72/90/110"""
+    rnd = random.Random(seed)
+    words = []
+    y, x = 50.0, 72.0
+    for i in range(n_words):
+        if i % 12 == 0:
+            y += 14
+            x = rnd.choice([72.0, 72.0, 72.0, 90.0, 110.0])
+        w = rnd.uniform(10, 40)
+        yy = y + rnd.uniform(-1.5, 1.5)
+        words.append((x, yy, x + w, yy + 11, f"w{i}", 0, 0, i))
+        x += w + 4
+    rnd.shuffle(words)
+    return words
+
+
+def bench(fn, words, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        res = fn(words)
+    return (time.perf_counter() - t0) / repeat, res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--words", type=int, nargs="*", default=[300, 1000, 3000])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    if not HAS_NUMPY:
+        print("Chưa cài numpy (pip install numpy)")
+        return
+
+    for n in args.words:
+        words = make_words(n)
+        t_py, res_py = bench(group_lines, words, args.repeat)
+        t_np, res_np = bench(group_lines_numpy, words, args.repeat)
+        assert res_py == res_np, "Kết quả 2 cách khác nhau!"
+        print(f"words={n:>6} | python {t_py * 1000:7.2f} ms/trang | numpy {t_np * 1000:7.2f} ms/trang | "
+              f"x{t_py / t_np:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark: trộn K mã đề từ 1 ngân hàng N câu.
+So sánh bộ nhớ giữ lại (tracemalloc) + thời gian: view hoán vị (mix_exam) vs list dict (mix_exam_data).
+
+Chạy từ root:
+    python bench/bench_mixer.py --questions 1000 --versions 24
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_exam
+from quiz_engine.mixer import mix_exam, mix_exam_data
+
+
+def measure(fn, questions, n_versions):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    kept = [fn(questions, seed=i) for i in range(n_versions)]
+    elapsed = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return elapsed, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--questions", type=int, default=1000)
+    ap.add_argument("--versions", type=int, default=24)
+    args = ap.parse_args()
+
+    questions, _ = make_exam(args.questions, images_per_question=0.3, seed=1)
+    for name, fn in (("mix_exam_data (list dict)", mix_exam_data), ("mix_exam (view)", mix_exam)):
+        elapsed, size = measure(fn, questions, args.versions)
+        print(f"{name:<26} | {args.versions} mã đề x {args.questions} câu | {elapsed * 1000:8.1f} ms | "
+              f"{size / 2**20:7.2f} MB ({size / args.versions / args.questions:6.1f} byte/câu)")
+
+
+if __name__ == "__main__":
+    main()
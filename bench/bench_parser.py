@@ -0,0 +1,116 @@
+"""
+Benchmark: parse_quiz_json_v18 trên văn bản giả lập N câu hỏi.
+So sánh bản cũ (re.split + finditer 2 lần/block) với bộ quét 1 lần (quiz_engine.parser).
+
+Chạy từ root:
+    python bench/bench_parser.py --questions 10000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine.parser import normalize_text, parse_quiz_json_v18
+
+
+def parse_quiz_json_old(raw_text, img_map):
+    """Bản cũ của appv3.parse_quiz_json_v18 (trước bộ quét 1 lần), giữ để so sánh"""
+    text = normalize_text(raw_text)
+    split_pattern = r'(?:\n\s*|^)(?=Câu\s+\d+[:\.])'
+    raw_questions = re.split(split_pattern, text)
+    quiz_data = []
+    for block in raw_questions:
+        block = block.strip()
+        if not block: continue
+        q_num_match = re.search(r'^Câu\s+(\d+)', block)
+        if not q_num_match: continue
+        q_id = int(q_num_match.group(1))
+        opt_pattern = r'(?:^|[\s])((?:\[\[([A-D])\]\]|([A-D]))[\.\)])'
+        matches = list(re.finditer(opt_pattern, block))
+        split_idx = -1
+        if matches:
+            first_a_idx = -1
+            for i, m in enumerate(matches):
+                char = m.group(2) or m.group(3)
+                if char == 'A':
+                    first_a_idx = i
+                    break
+            if first_a_idx != -1:
+                split_idx = matches[first_a_idx].start(1)
+        if split_idx != -1:
+            q_part = block[:split_idx]
+            opts_part = block[split_idx:]
+        else:
+            q_part = block
+            opts_part = ""
+        q_part = re.sub(r'^Câu\s+\d+[:\.]?\s*', '', q_part).strip()
+        question_obj = {"id": q_id, "question": q_part, "options": [], "correct_answer_index": -1, "images": []}
+        if opts_part:
+            markers = []
+            for m in re.finditer(opt_pattern, opts_part):
+                markers.append({'full': m.group(1), 'char': m.group(2) or m.group(3), 'start': m.start(1), 'end': m.end()})
+            parsed_opts = {"A": "", "B": "", "C": "", "D": ""}
+            correct_char = None
+            for i, m in enumerate(markers):
+                char = m['char']
+                if '[[' in m['full']: correct_char = char
+                start = m['end']
+                end = markers[i+1]['start'] if i < len(markers)-1 else len(opts_part)
+                parsed_opts[char] = opts_part[start:end].strip()
+            question_obj["options"] = [parsed_opts.get(k, "...") for k in "ABCD"]
+            if correct_char:
+                question_obj["correct_answer_index"] = ord(correct_char) - ord('A')
+        quiz_data.append(question_obj)
+    return quiz_data
+
+
+def make_text(n_questions, seed=0, long_ratio=0.3):
+    """Văn bản giống đầu ra process_pdf_v18: "Câu X:" + nội dung nhiều dòng + 4 đáp án (1 gạch chân)"""
+    rnd = random.Random(seed)
+    parts = []
+    for q in range(1, n_questions + 1):
+        body = " ".join(rnd.choice(["Cho", "hàm", "số", "y", "=", "x²", "giá", "trị", "của", "biểu", "thức"])
+                        for _ in range(rnd.randint(8, 40)))
+        parts.append(f"\n\nCâu {q}: {body}")
+        if rnd.random() < 0.3:
+            parts.append("\n    " + body[:40])
+        correct = rnd.randrange(4)
+        labels = [f"[[{c}]]." if i == correct else f"{c}." for i, c in enumerate("ABCD")]
+        if rnd.random() < long_ratio:
+            for lab in labels:
+                parts.append(f"\n{lab} " + " ".join(["đáp", "án", "dài"] * rnd.randint(3, 10)))
+        else:
+            parts.append("\n" + "   ".join(f"{lab} {rnd.randint(1, 999)}" for lab in labels))
+    return "".join(parts)
+
+
+def bench(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = fn(text, {})
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--questions", type=int, nargs="*", default=[1000, 10000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for n in args.questions:
+        text = make_text(n)
+        t_old, res_old = bench(parse_quiz_json_old, text, args.repeat)
+        t_new, res_new = bench(parse_quiz_json_v18, text, args.repeat)
+        assert res_old == res_new, "Kết quả 2 cách khác nhau!"
+        print(f"questions={n:>6} ({len(text) / 1e6:.1f} MB) | old {t_old * 1000:8.1f} ms | "
+              f"new {t_new * 1000:8.1f} ms | x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Bộ benchmark toàn pipeline trên đề thi giả lập (tái lập được nhờ seed):
+  1. sinh N câu hỏi (tỉ lệ có gạch chân đáp án đúng, số ảnh/câu, đáp án dài/ngắn)
+  2. dựng PDF + DOCX đầu vào dạng đề gốc (đáp án đúng gạch chân, có ảnh) bằng builder riêng
+     của bench; renderer của taode.py (generate_pdf_bytes / generate_word_bytes) chỉ được đo
+     thời gian, đúng như app gọi
+  3. đo: process_pdf_v18, extract_text_docx, parse_quiz_json_v18, mix_exam_data,
+     generate_pdf_bytes, generate_word_bytes
+In bảng kết quả, lưu baseline JSON và so sánh với baseline cũ.
+
+Chạy từ root:
+    python bench/bench_pipeline.py --questions 50 200 --save bench/baseline.json
+    python bench/bench_pipeline.py --questions 50 200 --compare bench/baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine.docx_extract import extract_text_docx
+from quiz_engine.mixer import mix_exam_data
+from quiz_engine.parser import parse_quiz_json_v18
+from quiz_engine.pdf_extract import EXTRACTOR_VERSION, process_pdf_v18
+from quiz_engine.render_pdf import generate_pdf_bytes
+from quiz_engine.render_word import generate_word_bytes
+
+WORDS = ["Cho", "hàm", "số", "y", "=", "x²", "giá", "trị", "của", "biểu", "thức", "bằng", "bao", "nhiêu",
+         "máy", "tính", "dữ", "liệu", "thuật", "toán", "mạng", "Internet", "tệp", "thư", "mục"]
+STAGES = ["generate_pdf_bytes", "generate_word_bytes", "process_pdf_v18", "extract_text_docx",
+          "parse_quiz_json_v18", "mix_exam_data"]
+
+
+# --- 1. SINH ĐỀ GIẢ LẬP ---
+
+def make_images(count, seed=0):
+    """count ảnh PNG nhỏ khác nhau: {tên: bytes}"""
+    from PIL import Image
+    rnd = random.Random(seed)
+    images = {}
+    for i in range(count):
+        buf = io.BytesIO()
+        color = tuple(rnd.randrange(256) for _ in range(3))
+        Image.new("RGB", (rnd.randint(160, 320), rnd.randint(80, 160)), color).save(buf, format="PNG")
+        images[f"fig_{i + 1}.png"] = buf.getvalue()
+    return images
+
+
+def make_exam(n_questions, underlined=1.0, images_per_question=0.0, long_ratio=0.3, seed=0):
+    """
+    Trả về (questions, images) đúng định dạng quiz_data.json (+ display_id để xuất thẳng).
+    underlined: tỉ lệ câu có đáp án đúng (gạch chân trong file xuất ra)
+    images_per_question: số ảnh trung bình mỗi câu (vd 0.5 = cứ 2 câu 1 ảnh)
+    long_ratio: tỉ lệ câu có đáp án dài (mỗi đáp án 1 dòng thay vì bảng 2x2)
+    """
+    rnd = random.Random(seed)
+    n_images = int(round(n_questions * images_per_question))
+    images = make_images(min(n_images, 20), seed) if n_images else {}
+    names = list(images)
+    owners = sorted(rnd.randrange(n_questions) for _ in range(n_images))
+
+    questions = []
+    for idx in range(n_questions):
+        q_id = idx + 1
+        body = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 40)))
+        if rnd.random() < long_ratio:
+            options = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(10, 20))) for _ in range(4)]
+        else:
+            options = [str(rnd.randint(1, 999)) for _ in range(4)]
+        questions.append({
+            "id": q_id,
+            "display_id": q_id,
+            "question": body + "?",
+            "options": options,
+            "correct_answer_index": rnd.randrange(4) if rnd.random() < underlined else -1,
+            "images": [names[i % len(names)] for i, owner in enumerate(owners) if owner == idx],
+        })
+    return questions, images
+
+
+def make_pdf(questions, images):
+    """
+    PDF đầu vào cho process_pdf_v18: "Câu N: ...", ảnh ngay dưới câu hỏi (rộng tối đa 8cm),
+    mỗi đáp án 1 đoạn, nhãn đáp án đúng gạch chân. Dùng font/style của quiz_engine.render_pdf.
+    """
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate
+    from quiz_engine.render_pdf import format_text_pdf, get_render_context
+
+    ctx = get_render_context()
+    story = []
+    for q in questions:
+        story.append(Paragraph(f"<b>Câu {q['id']}:</b> {format_text_pdf(q['question'])}", ctx.style_q))
+        for name in q["images"]:
+            img = Image(io.BytesIO(images[name]))
+            scale = min(1.0, 8 * cm / img.imageWidth)
+            img.drawWidth, img.drawHeight = img.imageWidth * scale, img.imageHeight * scale
+            story.append(img)
+        for i, opt in enumerate(q["options"]):
+            label = f"{'ABCD'[i]}."
+            if i == q["correct_answer_index"]:
+                label = f"<u>{label}</u>"
+            story.append(Paragraph(f"<b>{label}</b> {format_text_pdf(opt)}", ctx.style_opt))
+    buf = io.BytesIO()
+    SimpleDocTemplate(buf, leftMargin=3 * cm, rightMargin=2 * cm, topMargin=2 * cm, bottomMargin=2 * cm).build(story)
+    return buf.getvalue()
+
+
+def make_docx(questions, images):
+    """
+    DOCX đầu vào cho extract_text_docx, đúng dạng đề gốc appv3 đọc được: "Câu N: ...",
+    ảnh ngay dưới câu hỏi, mỗi đáp án 1 đoạn, nhãn đáp án đúng là run gạch chân riêng.
+    (generate_word_bytes xếp đáp án trong bảng -> không dùng làm đầu vào được)
+    """
+    from docx import Document
+    from docx.shared import Cm
+    doc = Document()
+    for q in questions:
+        doc.add_paragraph(f"Câu {q['id']}: {q['question']}")
+        for name in q["images"]:
+            doc.add_picture(io.BytesIO(images[name]), width=Cm(8))
+        for i, opt in enumerate(q["options"]):
+            p = doc.add_paragraph()
+            p.add_run(f"{'ABCD'[i]}.").underline = i == q["correct_answer_index"]
+            p.add_run(f" {opt}")
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# --- 2. ĐO ---
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run_case(n_questions, args):
+    questions, images = make_exam(n_questions, args.underlined, args.images_per_question,
+                                  args.long_ratio, args.seed)
+    times = {}
+    times["generate_pdf_bytes"], _ = best_of(lambda: generate_pdf_bytes(questions).getvalue(), args.repeat)
+    times["generate_word_bytes"], _ = best_of(lambda: generate_word_bytes(questions).getvalue(), args.repeat)
+    pdf, docx = make_pdf(questions, images), make_docx(questions, images)
+    times["process_pdf_v18"], (raw_text, img_map) = best_of(
+        lambda: process_pdf_v18(io.BytesIO(pdf)), args.repeat)
+    times["extract_text_docx"], docx_text = best_of(lambda: extract_text_docx(io.BytesIO(docx)), args.repeat)
+    times["parse_quiz_json_v18"], parsed = best_of(lambda: parse_quiz_json_v18(raw_text, img_map), args.repeat)
+    times["mix_exam_data"], _ = best_of(lambda: mix_exam_data(questions), args.repeat)
+
+    # Kiểm tra đọc lại đúng: số câu, đáp án đúng, ảnh (PDF); số câu, đáp án đúng (DOCX, không tách ảnh)
+    parsed_docx = parse_quiz_json_v18(docx_text, {})
+    check = {
+        "questions": len(parsed),
+        "answers": sum(1 for q in parsed if q["correct_answer_index"] != -1),
+        "expected_questions": len(questions),
+        "expected_answers": sum(1 for q in questions if q["correct_answer_index"] != -1),
+        "images": sum(len(q["images"]) for q in parsed),
+        "expected_images": sum(len(q["images"]) for q in questions),
+        "docx_questions": len(parsed_docx),
+        "docx_answers": sum(1 for q in parsed_docx if q["correct_answer_index"] != -1),
+        "pdf_kb": len(pdf) // 1024,
+        "docx_kb": len(docx) // 1024,
+    }
+    return times, check
+
+
+# --- 3. BÁO CÁO ---
+
+def print_table(results, baseline=None):
+    sizes = list(results)
+    header = f"{'giai đoạn':<22}" + "".join(f"{f'N={n} (ms)':>16}" for n in sizes)
+    print(header)
+    print("-" * len(header))
+    for stage in STAGES:
+        row = f"{stage:<22}"
+        for n in sizes:
+            ms = results[n]["seconds"][stage] * 1000
+            cell = f"{ms:.1f}"
+            old = (baseline or {}).get(n, {}).get("seconds", {}).get(stage)
+            if old:
+                cell += f" ({(ms / (old * 1000) - 1) * 100:+.0f}%)"
+            row += f"{cell:>16}"
+        print(row)
+    for n in sizes:
+        c = results[n]["check"]
+        print(f"N={n}: đọc lại PDF {c['questions']}/{c['expected_questions']} câu, "
+              f"{c['answers']}/{c['expected_answers']} đáp án, {c['images']}/{c['expected_images']} ảnh | "
+              f"DOCX {c['docx_questions']}/{c['expected_questions']} câu, "
+              f"{c['docx_answers']}/{c['expected_answers']} đáp án | PDF {c['pdf_kb']} KB, DOCX {c['docx_kb']} KB")
+        if (c["questions"], c["answers"], c["docx_questions"], c["docx_answers"]) != \
+                (c["expected_questions"], c["expected_answers"]) * 2:
+            print(f"⚠️  N={n}: đọc lại không khớp đề gốc - thời gian đo có thể không phản ánh đúng")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--questions", type=int, nargs="*", default=[50, 200])
+    ap.add_argument("--underlined", type=float, default=0.9, help="tỉ lệ câu có đáp án gạch chân")
+    ap.add_argument("--images-per-question", type=float, default=0.3)
+    ap.add_argument("--long-ratio", type=float, default=0.3, help="tỉ lệ câu có đáp án dài")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", help="lưu kết quả làm baseline (JSON)")
+    ap.add_argument("--compare", help="so sánh với baseline JSON đã lưu")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {int(n): res for n, res in json.load(f)["results"].items()}
+
+    # Chạy nháp 1 đề nhỏ: nạp thư viện, font, ... không tính vào kết quả
+    run_case(5, argparse.Namespace(**{**vars(args), "repeat": 1}))
+
+    results = {}
+    for n in args.questions:
+        seconds, check = run_case(n, args)
+        results[n] = {"seconds": seconds, "check": check}
+    print_table(results, baseline)
+
+    if args.save:
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+            "env": {"python": platform.python_version(), "platform": platform.platform(),
+                    "extractor": EXTRACTOR_VERSION},
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f">>> Đã lưu baseline: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark: chi phí mỗi lần xuất PDF khi dựng lại font + style (như trước) và khi dùng
+RenderContext chung của process (đăng ký font Times/Timesbd/Timesi + style 1 lần).
+
+Chạy từ root:
+    python bench/bench_render.py --questions 5 40 --docs 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_exam
+from quiz_engine import render_pdf
+from quiz_engine.render_pdf import RenderContext, generate_pdf_bytes
+
+
+def per_doc(questions, n_docs, rebuild):
+    t0 = time.perf_counter()
+    for i in range(n_docs):
+        if rebuild:
+            render_pdf._render_context = None  # như cũ: đọc TTF + dựng style ở mỗi lần gọi
+        generate_pdf_bytes(questions, "exam" if i % 2 == 0 else "key")
+    return (time.perf_counter() - t0) / n_docs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--questions", type=int, nargs="*", default=[5, 40])
+    ap.add_argument("--docs", type=int, default=20, help="số file PDF xuất cho mỗi cấu hình (xen kẽ đề / đáp án)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    RenderContext()
+    print(f"Dựng RenderContext (đọc 3 file TTF + style): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    for n in args.questions:
+        questions, _ = make_exam(n, seed=1)
+        generate_pdf_bytes(questions)  # chạy nháp: nạp module reportlab
+        old = per_doc(questions, args.docs, rebuild=True)
+        new = per_doc(questions, args.docs, rebuild=False)
+        print(f"N={n:>4} câu | dựng lại mỗi lần {old * 1000:7.1f} ms/file | dùng chung {new * 1000:7.1f} ms/file | "
+              f"tiết kiệm {(old - new) * 1000:6.1f} ms/file ({(1 - new / old) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: dò gạch chân trên 1 trang "nặng" đường kẻ (bảng, đề scan vector hóa).
+So sánh quét tuyến tính (cách cũ) với UnderlineIndex.
+
+Chạy từ root:
+    python bench/bench_underline.py --drawings 5000 --markers 400
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_engine.underline import UnderlineIndex
+
+
+def linear_is_underlined(word_rect, drawings):
+    """Bản cũ: duyệt mọi đường kẻ cho mỗi từ"""
+    wx0, wy0, wx1, wy1 = word_rect
+    w_center_y = (wy0 + wy1) / 2
+    for lx0, ly0, lx1, ly1 in drawings:
+        if not (w_center_y < ly0 < wy1 + 12):
+            continue
+        if min(wx1, lx1) > max(wx0, lx0) + 2:
+            return True
+    return False
+
+
+def indexed_is_underlined(word_rect, index):
+    wx0, _, wx1, _ = word_rect
+    for lx0, _, lx1, _ in index.candidates(word_rect):
+        if min(wx1, lx1) > max(wx0, lx0) + 2:
+            return True
+    return False
+
+
+def make_page(n_drawings, n_markers, seed=0, underline_ratio=0.25):
+    """
+    Trang A4 giả: n_drawings đường kẻ mảnh của bảng (cột phải)
+    + n_markers từ A./B./C./D. (cột trái), ~25% có gạch chân thật.
+    """
+    rnd = random.Random(seed)
+    drawings = []
+    for _ in range(n_drawings):
+        x0 = rnd.uniform(300, 500)
+        y = rnd.uniform(40, 800)
+        drawings.append([x0, y, x0 + rnd.uniform(5, 50), y + rnd.uniform(0, 1)])
+    words = []
+    for _ in range(n_markers):
+        x0 = rnd.uniform(60, 260)
+        y0 = rnd.uniform(40, 800)
+        words.append([x0, y0, x0 + 12, y0 + 11])
+        if rnd.random() < underline_ratio:
+            drawings.append([x0, y0 + 12, x0 + 10, y0 + 12.5])
+    rnd.shuffle(drawings)
+    return drawings, words
+
+
+def run(n_drawings, n_markers, repeat):
+    drawings, words = make_page(n_drawings, n_markers)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        res_linear = [linear_is_underlined(w, drawings) for w in words]
+    t_linear = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        index = UnderlineIndex(drawings)  # dựng lại mỗi trang, tính cả chi phí dựng
+        res_index = [indexed_is_underlined(w, index) for w in words]
+    t_index = (time.perf_counter() - t0) / repeat
+
+    assert res_linear == res_index, "Kết quả 2 cách khác nhau!"
+    print(f"drawings={n_drawings:>6} markers={n_markers:>5} | "
+          f"linear {t_linear * 1000:8.2f} ms/trang | index {t_index * 1000:7.2f} ms/trang | "
+          f"x{t_linear / t_index:.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--drawings", type=int, nargs="*", default=[100, 1000, 5000])
+    ap.add_argument("--markers", type=int, default=400)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    for n in args.drawings:
+        run(n, args.markers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
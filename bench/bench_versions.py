@@ -0,0 +1,42 @@
+"""
+Benchmark: tạo K mã đề (PDF + Word, đề + đáp án) với số process tăng dần.
+Kỳ vọng thời gian giảm gần tuyến tính theo số nhân CPU.
+
+Chạy từ root:
+    python bench/bench_versions.py --versions 8 --questions 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import make_exam
+from quiz_engine.versions import generate_versions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--versions", type=int, default=8)
+    ap.add_argument("--questions", type=int, default=50)
+    ap.add_argument("--workers", type=int, nargs="*", default=None, help="mặc định: 1, 2, 4, ... tới số CPU")
+    args = ap.parse_args()
+
+    questions, _ = make_exam(args.questions, seed=1)
+    cpu = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, *[w for w in (2, 4, 8, 16) if w < cpu], cpu})
+
+    base = None
+    for workers in workers_list:
+        t0 = time.perf_counter()
+        generate_versions(questions, args.versions, seed=1, workers=workers)
+        elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print(f"workers={workers:>3} | {args.versions} mã đề x {args.questions} câu | {elapsed:6.2f}s | "
+              f"{args.versions / elapsed:5.2f} mã đề/s | x{base / elapsed:.1f}")
+    print(f"(máy có {cpu} CPU)")
+
+
+if __name__ == "__main__":
+    main()
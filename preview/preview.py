@@ -1,9 +1,10 @@
+import argparse
+import hashlib
 import os
 import json
-import tkinter as tk
-from tkinter import filedialog
-from jinja2 import Environment, FileSystemLoader
+import sys
 from livereload import Server
+from markupsafe import Markup
 
 # --- 1. CẤU HÌNH ĐƯỜNG DẪN (Tính 1 lần dùng chung) ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__)) # Thư mục chứa file .py này
@@ -12,12 +13,24 @@ PARENT_DIR = os.path.dirname(SCRIPT_DIR)                # Thư mục cha (Projec
 # Cấu hình template
 TEMPLATE_DIR_NAME = "template"
 TEMPLATE_FILE_NAME = "index.jinja2"
+QUESTION_FILE_NAME = "question.jinja2"
+CSS_FILE_NAME = "style.css"
 OUTPUT_FILE_NAME = "index.html"
+PATCH_FILE_NAME = "patch.json"
 
 # Đường dẫn tuyệt đối (Dùng xuyên suốt chương trình)
 TEMPLATE_FOLDER_PATH = os.path.join(PARENT_DIR, TEMPLATE_DIR_NAME)
 TEMPLATE_FULL_PATH = os.path.join(TEMPLATE_FOLDER_PATH, TEMPLATE_FILE_NAME)
+QUESTION_FULL_PATH = os.path.join(TEMPLATE_FOLDER_PATH, QUESTION_FILE_NAME)
+CSS_FULL_PATH = os.path.join(TEMPLATE_FOLDER_PATH, CSS_FILE_NAME)
 OUTPUT_FILE_PATH = os.path.join(SCRIPT_DIR, OUTPUT_FILE_NAME)
+PATCH_FILE_PATH = os.path.join(SCRIPT_DIR, PATCH_FILE_NAME)
+
+sys.path.insert(0, PARENT_DIR)
+from quiz_engine.html_template import HtmlRenderContext
+
+# Environment dựng 1 lần; auto_reload: chỉ biên dịch lại template/style.css khi file đổi
+RENDER_CTX = HtmlRenderContext(TEMPLATE_FOLDER_PATH, TEMPLATE_FILE_NAME, auto_reload=True)
 
 # --- 2. DỮ LIỆU MẪU (FALLBACK) ---
 MOCK_DATA = [
@@ -36,23 +49,90 @@ MOCK_DATA = [
     }
 ]
 
-# Biến toàn cục để lưu dữ liệu đang dùng (JSON hoặc MOCK)
+# Biến toàn cục để lưu dữ liệu đang dùng (JSON hoặc MOCK) - đọc 1 lần, giữ trong RAM
 CURRENT_DATA = []
+DATA_FILE_PATH = ""
+
+# Trạng thái render tăng dần:
+#   FRAGMENTS        : khóa nội dung -> HTML 1 câu (chỉ render lại câu có khóa mới)
+#   PAGE_KEYS        : khóa các câu đang hiển thị (theo thứ tự)
+#   PAGE_VERSION     : phiên bản trang; trình duyệt chỉ vá nếu đang ở đúng phiên bản trước đó
+#   FRAGMENT_VERSION : tăng khi question.jinja2 đổi -> mọi khóa cũ mất hiệu lực
+FRAGMENTS = {}
+PAGE_KEYS = []
+PAGE_VERSION = 0
+FRAGMENT_VERSION = 0
+
+# Plugin livereload.js: thay vì tải lại cả trang, lấy patch.json và chỉ thay các câu đã đổi + CSS.
+# Đổi index.jinja2 (khung trang) hoặc lệch phiên bản -> tải lại cả trang như cũ.
+PATCH_SCRIPT = """
+<script>
+window.__previewVersion = __VERSION__;
+function QuizPatchPlugin() {}
+QuizPatchPlugin.identifier = "quiz-patch";
+QuizPatchPlugin.version = "1.0";
+QuizPatchPlugin.prototype.reload = function (path) {
+    if (/index\\.jinja2$/.test(path)) return false;
+    fetch("__PATCH__", { cache: "no-store" })
+        .then(function (r) { return r.json(); })
+        .then(applyPatch)
+        .catch(function () { location.reload(); });
+    return true;
+};
+function applyPatch(patch) {
+    if (patch.version === window.__previewVersion) return;
+    if (patch.base !== window.__previewVersion) { location.reload(); return; }
+    if (patch.css !== null) document.getElementById("page-style").textContent = patch.css;
+    var box = document.getElementById("questions");
+    var old = {};
+    box.querySelectorAll(":scope > .preview-fragment").forEach(function (el) { old[el.dataset.key] = el; });
+    var tpl = document.createElement("template");
+    var nodes = patch.keys.map(function (key) {
+        if (old[key]) return old[key];
+        if (!(key in patch.blocks)) return null;
+        tpl.innerHTML = patch.blocks[key];
+        return tpl.content.firstElementChild;
+    });
+    if (nodes.indexOf(null) !== -1) { location.reload(); return; }
+    box.replaceChildren.apply(box, nodes);
+    window.__previewVersion = patch.version;
+}
+window.LiveReloadPluginQuizPatch = QuizPatchPlugin;
+if (window.LiveReload) window.LiveReload.addPlugin(QuizPatchPlugin);
+</script>
+"""
 
 # --- 3. CÁC HÀM XỬ LÝ ---
 
-def load_data_source():
-    """Mở hộp thoại chọn JSON. Trả về data từ file hoặc Mock data."""
+def select_file():
+    """Mở hộp thoại chọn JSON. Trả về đường dẫn hoặc "" (Cancel / không có màn hình)"""
     print(">>> Đang khởi động hộp thoại chọn file...")
-    
-    # Ẩn cửa sổ chính của Tkinter
-    root = tk.Tk()
+    try:
+        # Import muộn: chạy trên server không có tkinter / màn hình thì dùng dữ liệu mẫu
+        import tkinter as tk
+        from tkinter import filedialog
+
+        # Ẩn cửa sổ chính của Tkinter
+        root = tk.Tk()
+    except Exception as e:
+        print(f">>> Không mở được hộp thoại ({e}).")
+        return ""
     root.withdraw()
     
     file_path = filedialog.askopenfilename(
         title="Chọn file dữ liệu JSON (Cancel để dùng dữ liệu mẫu)",
         filetypes=[("JSON Files", "*.json")]
     )
+    root.destroy()
+    return file_path
+
+def load_data_source(file_path=None):
+    """
+    Trả về data từ file JSON hoặc Mock data.
+    file_path: None = mở hộp thoại chọn file; "" = dùng luôn dữ liệu mẫu.
+    """
+    if file_path is None:
+        file_path = select_file()
     
     if file_path:
         print(f">>> Đã chọn file: {os.path.basename(file_path)}")
@@ -64,35 +144,114 @@ def load_data_source():
         except Exception as e:
             print(f"❌ Lỗi đọc file JSON: {e}. Chuyển về dùng Mock Data.")
     else:
-        print(">>> Bạn đã hủy chọn file. Đang sử dụng DỮ LIỆU MẪU (Mock Data).")
+        print(">>> Không có file JSON. Đang sử dụng DỮ LIỆU MẪU (Mock Data).")
     
-    root.destroy()
     return MOCK_DATA
 
+def fragment_key(item, number):
+    """Khóa 1 câu: nội dung câu + số thứ tự + phiên bản question.jinja2"""
+    raw = json.dumps([FRAGMENT_VERSION, number, item], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def build_fragments():
+    """Render các câu chưa có trong FRAGMENTS. Trả về (khóa theo thứ tự, {khóa: HTML câu mới})"""
+    keys, new_blocks = [], {}
+    for number, item in enumerate(CURRENT_DATA, 1):
+        key = fragment_key(item, number)
+        if key not in FRAGMENTS:
+            html = RENDER_CTX.render_question(item, number)
+            # Bọc để trình duyệt tìm được câu theo khóa; display: contents -> không ảnh hưởng CSS
+            FRAGMENTS[key] = Markup(f'<div class="preview-fragment" data-key="{key}" style="display: contents">'
+                                    f'{html}</div>')
+            new_blocks[key] = str(FRAGMENTS[key])
+        keys.append(key)
+    # Bỏ câu không còn trên trang (memo không phình mãi)
+    for key in set(FRAGMENTS).difference(keys):
+        del FRAGMENTS[key]
+    return keys, new_blocks
+
+def write_page(keys):
+    """Ghép trang từ các câu đã render sẵn (không render lại câu nào)"""
+    html_content = RENDER_CTX.render(CURRENT_DATA, fragments=[FRAGMENTS[k] for k in keys])
+    script = PATCH_SCRIPT.replace("__VERSION__", str(PAGE_VERSION)).replace("__PATCH__", PATCH_FILE_NAME)
+    html_content = html_content.replace("</body>", script + "</body>", 1)
+    with open(OUTPUT_FILE_PATH, "w", encoding="utf-8") as f:
+        f.write(html_content)
+
+def update_page(css=False):
+    """Render lại câu đã đổi, ghi index.html (cho lần tải mới) + patch.json (để trình duyệt vá)"""
+    global PAGE_KEYS, PAGE_VERSION
+    try:
+        keys, new_blocks = build_fragments()
+        if keys == PAGE_KEYS and not css:
+            print(">>> Không có câu nào thay đổi.")
+            return
+        base = PAGE_VERSION
+        PAGE_VERSION += 1
+        write_page(keys)
+        patch = {
+            "version": PAGE_VERSION,
+            "base": base,
+            "keys": keys,
+            "blocks": new_blocks,
+            "css": RENDER_CTX.get_template(CSS_FILE_NAME).render() if css else None,
+        }
+        with open(PATCH_FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump(patch, f, ensure_ascii=False)
+        PAGE_KEYS = keys
+        print(f">>> ♻️  Vá trang: {len(new_blocks)}/{len(keys)} câu render lại" + (" + CSS" if css else ""))
+    except Exception as e:
+        print(f"❌ Lỗi Render: {e}")
+
 def render_html():
-    """Hàm render, sẽ được gọi lại mỗi khi file template thay đổi"""
+    """Render cả trang - gọi lúc khởi động và khi khung trang (index.jinja2) thay đổi"""
+    global PAGE_KEYS, PAGE_VERSION
     print(">>> ♻️  Đang render lại HTML...")
     
-    # Setup Jinja2 Environment
-    env = Environment(loader=FileSystemLoader(TEMPLATE_FOLDER_PATH), autoescape=True)
-    
     try:
-        template = env.get_template(TEMPLATE_FILE_NAME)
-        
-        # Render với dữ liệu hiện tại (Global variable)
-        html_content = template.render(questions=CURRENT_DATA)
-        
-        with open(OUTPUT_FILE_PATH, "w", encoding="utf-8") as f:
-            f.write(html_content)
+        keys, _ = build_fragments()
+        PAGE_VERSION += 1
+        write_page(keys)
+        PAGE_KEYS = keys
             
     except Exception as e:
         print(f"❌ Lỗi Render: {e}")
 
-def main():
-    global CURRENT_DATA # Khai báo dùng biến toàn cục
+def on_question_template_change():
+    """question.jinja2 đổi: mọi câu render lại, nhưng vẫn vá thay vì tải lại trang"""
+    global FRAGMENT_VERSION
+    FRAGMENT_VERSION += 1
+    update_page()
+
+def on_css_change():
+    update_page(css=True)
+
+def on_data_change():
+    """File JSON đổi: đọc lại, chỉ render lại câu có nội dung/số thứ tự khác"""
+    global CURRENT_DATA
+    try:
+        with open(DATA_FILE_PATH, 'r', encoding='utf-8') as f:
+            CURRENT_DATA = json.load(f)
+    except Exception as e:
+        # Trình soạn thảo có thể đang ghi dở -> giữ dữ liệu cũ, lần lưu sau đọc lại
+        print(f"❌ Lỗi đọc file JSON: {e}. Giữ dữ liệu cũ.")
+        return
+    update_page()
+
+def main(argv=None):
+    global CURRENT_DATA, DATA_FILE_PATH # Khai báo dùng biến toàn cục
+
+    ap = argparse.ArgumentParser(prog="python preview/preview.py",
+                                 description="Live preview template/index.jinja2 với dữ liệu JSON")
+    ap.add_argument("json", nargs="?", help="file JSON dữ liệu (bỏ trống = hộp thoại chọn file)")
+    ap.add_argument("--mock", action="store_true", help="dùng dữ liệu mẫu, không mở hộp thoại")
+    ap.add_argument("--port", type=int, default=5500)
+    ap.add_argument("--no-browser", action="store_true", help="không tự mở trình duyệt (chạy trên server)")
+    args = ap.parse_args(argv)
     
     # 1. Load dữ liệu đầu vào
-    CURRENT_DATA = load_data_source()
+    DATA_FILE_PATH = "" if args.mock else (args.json or select_file())
+    CURRENT_DATA = load_data_source(DATA_FILE_PATH)
     
     # 2. Render lần đầu tiên
     render_html()
@@ -103,18 +262,23 @@ def main():
     print(f"\n--- THÔNG TIN CẤU HÌNH ---")
     print(f"• Template Folder: {TEMPLATE_FOLDER_PATH}")
     print(f"• Watching File:   {TEMPLATE_FULL_PATH}")
+    print(f"                   {QUESTION_FULL_PATH}")
+    print(f"                   {CSS_FULL_PATH}")
+    if DATA_FILE_PATH:
+        print(f"                   {DATA_FILE_PATH}")
     print(f"--------------------------\n")
 
     # Canh chừng file template (Dùng đường dẫn tuyệt đối đã tính ở trên)
+    # Khung trang đổi -> tải lại cả trang; câu hỏi / CSS / dữ liệu đổi -> chỉ vá phần đã đổi
     server.watch(TEMPLATE_FULL_PATH, render_html)
-    
-    # Mẹo: Nếu muốn canh cả file CSS nằm cùng folder template
-    # css_path = os.path.join(TEMPLATE_FOLDER_PATH, "style.css")
-    # server.watch(css_path, render_html)
+    server.watch(QUESTION_FULL_PATH, on_question_template_change)
+    server.watch(CSS_FULL_PATH, on_css_change)
+    if DATA_FILE_PATH:
+        server.watch(DATA_FILE_PATH, on_data_change)
 
     # Mở trình duyệt
-    print(f">>> 🚀 Server đang chạy tại: http://127.0.0.1:5500/{OUTPUT_FILE_NAME}")
-    server.serve(port=5500, root=SCRIPT_DIR, open_url_delay=1)
+    print(f">>> 🚀 Server đang chạy tại: http://127.0.0.1:{args.port}/{OUTPUT_FILE_NAME}")
+    server.serve(port=args.port, root=SCRIPT_DIR, open_url_delay=None if args.no_browser else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
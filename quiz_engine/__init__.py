@@ -0,0 +1,4 @@
+"""
+Lõi xử lý đề thi (không phụ thuộc Streamlit).
+Các file giao diện (appv3.py, taode.py, ...) import từ đây.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from quiz_engine.batch import main
+
+sys.exit(main())
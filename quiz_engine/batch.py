@@ -0,0 +1,290 @@
+"""
+Trích xuất hàng loạt (không cần giao diện): PDF/DOCX -> quiz_data.json + ảnh.
+
+Chạy từ root:
+    python -m quiz_engine <thư mục | file | glob> ... -o <thư mục kết quả> [-j số worker]
+
+Mỗi file nguồn ra 1 thư mục con (giữ cấu trúc thư mục gốc). File không đổi
+so với lần chạy trước (cùng nội dung + cùng EXTRACTOR_VERSION) sẽ được bỏ qua.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from quiz_engine.docx_extract import docx_to_text
+from quiz_engine.export import write_quiz_dir
+from quiz_engine.memory import peak_rss_mb
+from quiz_engine.profiling import PipelineProfile
+from quiz_engine.parser import parse_quiz_json_v18
+from quiz_engine.pdf_extract import EXTRACTOR_VERSION, process_pdf_v18
+
+SUPPORTED_EXTS = (".pdf", ".docx")
+# File đánh dấu nguồn đã xử lý (ghi sau cùng -> chạy dở thì lần sau làm lại)
+STAMP_NAME = ".source.json"
+# Báo cáo thời gian từng bước (--profile)
+PROFILE_NAME = "profile.json"
+
+
+# --- 1. GOM DANH SÁCH FILE ---
+
+def _glob_base(pattern):
+    """Phần thư mục cố định trước ký tự đại diện đầu tiên: "de/**/*.pdf" -> "de" """
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or "."
+
+
+def find_inputs(inputs, exts=SUPPORTED_EXTS):
+    """
+    inputs: thư mục / file / glob. Trả về list (đường dẫn file có đuôi thuộc exts, thư mục gốc)
+    - thư mục gốc dùng để giữ cấu trúc tương đối ở đầu ra. Mỗi file thật chỉ xuất hiện 1 lần.
+    """
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, _, filenames in os.walk(item):
+                for name in sorted(filenames):
+                    found.append((os.path.join(dirpath, name), item))
+        elif os.path.isfile(item):
+            found.append((item, os.path.dirname(item) or "."))
+        else:
+            base = _glob_base(item)
+            found.extend((path, base) for path in sorted(glob.glob(item, recursive=True)))
+
+    result = []
+    seen_src = set()
+    for path, base in found:
+        if os.path.splitext(path)[1].lower() not in exts or not os.path.isfile(path):
+            continue
+        real = os.path.realpath(path)
+        if real in seen_src:
+            continue
+        seen_src.add(real)
+        result.append((path, base))
+    return result
+
+
+def _out_key(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def unique_out_paths(items, out_root):
+    """
+    items: list (đường dẫn nguồn, thư mục gốc, đường dẫn tương đối đầu ra).
+    Trả về list đường dẫn đầu ra trong out_root, mỗi nguồn 1 đường dẫn riêng.
+    Nhiều nguồn trùng đường dẫn tương đối (vd in/HK1/de1.pdf, in/HK2/de1.pdf) -> thêm phần cuối
+    của thư mục gốc vào trước, ít nhất đủ để phân biệt (out/HK1/de1, out/HK2/de1;
+    x/HK1 và y/HK1 -> out/x/HK1/de1, out/y/HK1/de1). Không phân biệt được -> ValueError.
+    """
+    rels = [rel for _, _, rel in items]
+    groups = {}
+    for i, rel in enumerate(rels):
+        groups.setdefault(_out_key(rel), []).append(i)
+
+    for idxs in groups.values():
+        if len(idxs) < 2:
+            continue
+        roots = {i: [p for p in os.path.abspath(items[i][1]).split(os.sep) if p] for i in idxs}
+        for depth in range(1, max(len(r) for r in roots.values()) + 1):
+            prefixed = {i: os.path.join(*roots[i][-depth:], rels[i]) for i in idxs}
+            if len({_out_key(rel) for rel in prefixed.values()}) == len(idxs):
+                for i, rel in prefixed.items():
+                    rels[i] = rel
+                break
+
+    paths = [os.path.join(out_root, rel) for rel in rels]
+    owners = {}
+    for (src, _, _), out_path in zip(items, paths):
+        other = owners.setdefault(_out_key(out_path), src)
+        if other != src:
+            raise ValueError(f"{other} và {src} cùng ghi vào {out_path} - đổi tên thư mục gốc hoặc chạy riêng")
+    return paths
+
+
+def collect_jobs(inputs, out_root):
+    """
+    inputs: thư mục / file / glob.
+    Trả về list (đường dẫn nguồn, thư mục kết quả), thư mục kết quả giữ cấu trúc tương đối
+    (trùng nhau giữa các input -> xem unique_out_paths).
+    """
+    items = []
+    for path, base in find_inputs(inputs):
+        stem, ext = os.path.splitext(path)
+        ext = ext.lower()
+        rel = os.path.relpath(stem, base)
+        # Cùng tên khác đuôi (vd de1.pdf và de1.docx) -> thêm đuôi để không ghi đè nhau
+        if any(os.path.exists(stem + other) for other in SUPPORTED_EXTS if other != ext):
+            rel += "_" + ext.lstrip(".")
+        items.append((path, base, rel))
+    return list(zip((path for path, _, _ in items), unique_out_paths(items, out_root)))
+
+
+# --- 2. XỬ LÝ 1 FILE (chạy trong worker) ---
+
+def _read_stamp(out_dir):
+    try:
+        with open(os.path.join(out_dir, STAMP_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def process_file(src_path, out_dir, force=False, low_memory=False, profile=False):
+    """
+    Trích xuất 1 file vào out_dir. Trả về dict thống kê (status: ok/skipped/error)
+    low_memory: PDF mở thẳng từ đĩa, xử lý theo cửa sổ trang (không nạp cả file vào RAM).
+    profile: ghi thời gian + bộ đếm từng bước vào out_dir/profile.json.
+    """
+    t0 = time.perf_counter()
+    result = {"path": src_path, "out_dir": out_dir, "status": "ok", "pages": 0,
+              "questions": 0, "images": 0, "seconds": 0.0, "error": ""}
+    try:
+        st = os.stat(src_path)
+        stamp = _read_stamp(out_dir)
+        if (not force and stamp and stamp.get("version") == EXTRACTOR_VERSION
+                and stamp.get("size") == st.st_size and stamp.get("mtime_ns") == st.st_mtime_ns):
+            result["status"] = "skipped"
+            return result
+
+        digest = _file_sha256(src_path)
+        if not force and stamp and stamp.get("version") == EXTRACTOR_VERSION and stamp.get("sha256") == digest:
+            # Chỉ đổi mtime (copy lại, touch) -> cập nhật dấu, không xử lý lại
+            result["status"] = "skipped"
+        else:
+            ext = os.path.splitext(src_path)[1].lower()
+            prof = PipelineProfile() if profile else None
+            img_map = {}
+            if ext == ".pdf":
+                # Số trang lấy từ chính lần trích xuất (1 thống kê/trang), không mở PDF lần 2
+                page_stats = []
+                with open(src_path, "rb") as f:
+                    raw_text, img_map = process_pdf_v18(f, low_memory=low_memory, profile=prof,
+                                                        page_stats=page_stats)
+                result["pages"] = len(page_stats)
+            else:
+                t_docx = time.perf_counter()
+                raw_text = docx_to_text(src_path)
+                if prof: prof.add_time("docx", time.perf_counter() - t_docx)
+
+            t_parse = time.perf_counter()
+            json_data = parse_quiz_json_v18(raw_text, img_map)
+            t_write = time.perf_counter()
+            write_quiz_dir(out_dir, json_data, img_map)
+            if prof:
+                prof.add_time("parse", t_write - t_parse)
+                prof.add_time("write", time.perf_counter() - t_write)
+                with open(os.path.join(out_dir, PROFILE_NAME), "w", encoding="utf-8") as f:
+                    f.write(prof.to_json())
+            result["questions"] = len(json_data)
+            result["images"] = len({img.xref for imgs in img_map.values() for img in imgs})
+
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, STAMP_NAME), "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.abspath(src_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                       "sha256": digest, "version": EXTRACTOR_VERSION}, f)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+# --- 3. CHẠY HÀNG LOẠT ---
+
+def run_batch(jobs, workers=None, force=False, log=print, low_memory=False, profile=False):
+    """Chạy process_file song song. Trả về (list kết quả, thời gian chạy)"""
+    workers = workers or os.cpu_count() or 1
+    results = []
+    t0 = time.perf_counter()
+    if workers == 1:
+        for path, out_dir in jobs:
+            res = process_file(path, out_dir, force, low_memory, profile)
+            results.append(res)
+            log(_format_result(res))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_file, path, out_dir, force, low_memory, profile) for path, out_dir in jobs]
+            for fut in as_completed(futures):
+                res = fut.result()
+                results.append(res)
+                log(_format_result(res))
+    return results, time.perf_counter() - t0
+
+
+def _format_result(res):
+    if res["status"] == "error":
+        return f"❌ {res['path']}: {res['error']}"
+    if res["status"] == "skipped":
+        return f"⏭  {res['path']} (không đổi, bỏ qua)"
+    return (f"✅ {res['path']}: {res['questions']} câu, {res['images']} ảnh, "
+            f"{res['pages']} trang, {res['seconds']:.2f}s")
+
+
+def summarize(results, elapsed):
+    done = [r for r in results if r["status"] == "ok"]
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    errors = sum(1 for r in results if r["status"] == "error")
+    pages = sum(r["pages"] for r in done)
+    elapsed = max(elapsed, 1e-9)
+    return {
+        "files": len(done), "skipped": skipped, "errors": errors,
+        "pages": pages, "questions": sum(r["questions"] for r in done),
+        "seconds": elapsed, "files_per_s": len(done) / elapsed, "pages_per_s": pages / elapsed,
+        "peak_rss_mb": peak_rss_mb(include_children=True),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m quiz_engine", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="+", help="thư mục, file .pdf/.docx hoặc glob (vd 'de/**/*.pdf')")
+    ap.add_argument("-o", "--out", default="quiz_out", help="thư mục kết quả (mặc định: quiz_out)")
+    ap.add_argument("-j", "--jobs", type=int, default=0, help="số worker (mặc định: số CPU)")
+    ap.add_argument("--force", action="store_true", help="xử lý lại cả file không đổi")
+    ap.add_argument("--low-memory", action="store_true",
+                    help="tiết kiệm RAM cho PDF rất lớn: đọc thẳng từ đĩa, xử lý theo cửa sổ trang")
+    ap.add_argument("--profile", action="store_true",
+                    help=f"ghi thời gian + bộ đếm từng bước vào {PROFILE_NAME} trong thư mục kết quả")
+    args = ap.parse_args(argv)
+
+    try:
+        jobs = collect_jobs(args.inputs, args.out)
+    except ValueError as e:
+        print(f">>> Lỗi: {e}")
+        return 2
+    if not jobs:
+        print(">>> Không tìm thấy file .pdf/.docx nào.")
+        return 1
+
+    print(f">>> {len(jobs)} file, {args.jobs or os.cpu_count()} worker -> {args.out}")
+    results, elapsed = run_batch(jobs, workers=args.jobs, force=args.force,
+                                 low_memory=args.low_memory, profile=args.profile)
+    s = summarize(results, elapsed)
+
+    print("-" * 40)
+    print(f"Xử lý: {s['files']} file ({s['pages']} trang, {s['questions']} câu) | "
+          f"Bỏ qua: {s['skipped']} | Lỗi: {s['errors']}")
+    print(f"Thời gian: {s['seconds']:.2f}s | {s['files_per_s']:.2f} file/s | {s['pages_per_s']:.1f} trang/s")
+    if s["peak_rss_mb"] is not None:
+        print(f"RAM đỉnh (1 process): {s['peak_rss_mb']:.0f} MB")
+    return 1 if s["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+from quiz_engine.images import ImageRef
+
+# Cấu hình qua biến môi trường (hoặc truyền thẳng vào ExtractionCache)
+CACHE_DIR_ENV = "QUIZ_CACHE_DIR"
+CACHE_MAX_MB_ENV = "QUIZ_CACHE_MAX_MB"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "quiz-extract")
+DEFAULT_MAX_MB = 500
+
+ENTRY_EXT = ".zip"
+
+
+def content_key(data, version, kind=""):
+    """SHA-256 của nội dung file + phiên bản bộ trích xuất (+ loại file)"""
+    h = hashlib.sha256()
+    h.update(f"{version}|{kind}|".encode("utf-8"))
+    h.update(data)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache kết quả trích xuất trên đĩa, khóa theo content_key().
+    Mỗi entry là 1 file zip (ZIP_STORED): text.txt + images.json + bytes gốc của ảnh
+    (mỗi xref lưu 1 lần).
+    Đọc entry sẽ "chạm" mtime; vượt dung lượng thì xóa entry cũ nhất (LRU).
+    """
+    entry_ext = ENTRY_EXT
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.entry_ext)
+
+    def get(self, key):
+        """Trả về (raw_text, img_map) hoặc None nếu chưa có / entry hỏng"""
+        path = self._path(key)
+        try:
+            with zipfile.ZipFile(path) as zf:
+                raw_text = zf.read("text.txt").decode("utf-8")
+                index = json.loads(zf.read("images.json"))
+                refs = {}
+                for xref, ext in index["images"].items():
+                    refs[xref] = ImageRef(int(xref), ext, zf.read(f"x{xref}.{ext}"))
+                img_map = {int(q_id): [refs[str(x)] for x in xrefs] for q_id, xrefs in index["map"].items()}
+            os.utime(path)
+            return raw_text, img_map
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def put(self, key, raw_text, img_map):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as zf:
+                zf.writestr("text.txt", raw_text)
+                index = {"images": {}, "map": {}}
+                for q_id, imgs in img_map.items():
+                    index["map"][str(q_id)] = [img.xref for img in imgs]
+                    for img in imgs:
+                        if str(img.xref) not in index["images"]:
+                            index["images"][str(img.xref)] = img.ext
+                            zf.writestr(f"x{img.xref}.{img.ext}", img.data)
+                zf.writestr("images.json", json.dumps(index))
+            # Ghi xong mới đổi tên -> tiến trình khác không đọc phải entry dở dang
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try: os.remove(tmp_path)
+            except OSError: pass
+            raise
+        self.evict()
+
+    def evict(self):
+        """Xóa entry dùng lâu nhất đến khi tổng dung lượng <= max_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.name.endswith(self.entry_ext) and e.is_file():
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Xóa toàn bộ entry"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(self.entry_ext):
+                try: os.remove(os.path.join(self.cache_dir, name))
+                except OSError: pass
+
+
+class RenderCache(ExtractionCache):
+    """
+    Cache file đã xuất (PDF/DOCX) trên đĩa: mỗi entry là bytes của 1 file.
+    Nằm trong thư mục con render/ của cache trích xuất, xóa LRU riêng, cùng giới hạn dung lượng.
+    """
+    entry_ext = ".out"
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        base_dir = os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        super().__init__(cache_dir or os.path.join(base_dir, "render"), max_bytes)
+
+    def get(self, key):
+        """Bytes đã lưu hoặc None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try: os.remove(tmp_path)
+            except OSError: pass
+            raise
+        self.evict()
@@ -0,0 +1,29 @@
+import re
+
+
+def docx_to_text(file):
+    """
+    Đọc text từ Word, đánh dấu đáp án đúng (run gạch chân/in đậm chỉ chứa "A", "A.", "A)") thành [[A]].
+    file: đường dẫn hoặc file-like. Lỗi thì raise.
+    """
+    import docx  # python-docx (import muộn)
+    doc = docx.Document(file)
+    full_text = []
+    for para in doc.paragraphs:
+        para_text = ""
+        for run in para.runs:
+            text = run.text
+            if run.underline or run.bold:
+                if re.match(r'^\s*[A-D][\.\)]?\s*$', text) or re.match(r'^\s*[A-D]\s*$', text):
+                     char = text.strip()[0]; rest = text.strip()[1:]
+                     text = f"[[{char}]]{rest}"
+            para_text += text
+        full_text.append(para_text)
+    return "\n".join(full_text)
+
+
+def extract_text_docx(file):
+    """Như docx_to_text nhưng trả về chuỗi "Error: ..." thay vì raise (dùng cho UI)"""
+    try:
+        return docx_to_text(file)
+    except Exception as e: return f"Error: {str(e)}"
@@ -0,0 +1,100 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+from quiz_engine.images import WEB_EXTS, iter_unique_images
+
+# ZIP nhỏ hơn ngưỡng này nằm trong RAM, lớn hơn tự chuyển ra file tạm
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def create_zip(json_data, img_map, sink=None):
+    """
+    Ghi quiz_data.json + ảnh vào ZIP lần lượt từng entry.
+    sink: file-like ghi được (kể cả không seek được); None = SpooledTemporaryFile.
+    Trả về sink (đã tua về đầu nếu seek được).
+    """
+    if sink is None:
+        sink = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, False) as zf:
+        zf.writestr("quiz_data.json", json.dumps(json_data, ensure_ascii=False, indent=4))
+        for name, img in iter_unique_images(img_map):
+            # Ảnh đã nén sẵn -> ZIP_STORED (DEFLATE lại chỉ tốn CPU, không nhỏ đi)
+            ctype = zipfile.ZIP_STORED if img.out_ext in WEB_EXTS else zipfile.ZIP_DEFLATED
+            zf.writestr(name, img.encoded(), compress_type=ctype)
+    if sink.seekable():
+        sink.seek(0)
+    return sink
+
+
+def write_quiz_dir(out_dir, json_data, img_map):
+    """
+    Ghi quiz_data.json + ảnh (bytes gốc, mỗi ảnh 1 file) vào thư mục out_dir.
+    Ảnh của lần ghi trước (image_q*) mà quiz_data.json mới không dùng nữa bị xóa.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "quiz_data.json"), "w", encoding="utf-8") as f:
+        json.dump(json_data, f, ensure_ascii=False, indent=4)
+    written = set()
+    for name, img in iter_unique_images(img_map):
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(img.encoded())
+        written.add(name)
+    _remove_stale_images(out_dir, written)
+
+
+def _remove_stale_images(out_dir, keep):
+    """Xóa file ảnh do write_quiz_dir ghi (image_q*.<đuôi ảnh>) không nằm trong keep"""
+    for name in os.listdir(out_dir):
+        ext = os.path.splitext(name)[1].lstrip(".").lower()
+        if name.startswith("image_q") and ext in WEB_EXTS and name not in keep:
+            try: os.remove(os.path.join(out_dir, name))
+            except OSError: pass
+
+
+class ExportCache:
+    """
+    ZIP đã build, khóa theo lần trích xuất (content key). Lưu ra file tạm (không giữ trong RAM
+    giữa các lần tải), tối đa max_items file: cũ nhất bị xóa, còn lại xóa khi thoát process.
+    An toàn khi gọi từ nhiều thread (download_button chạy callable ở thread riêng).
+    """
+
+    def __init__(self, max_items=4):
+        self.max_items = max_items
+        self._paths = OrderedDict()
+        self._lock = threading.Lock()
+        atexit.register(self.clear)
+
+    def get_bytes(self, key, json_data, img_map):
+        with self._lock:
+            path = self._paths.get(key)
+            if path is None or not os.path.exists(path):
+                fd, path = tempfile.mkstemp(prefix="quiz_export_", suffix=".zip")
+                with os.fdopen(fd, "wb") as f:
+                    create_zip(json_data, img_map, sink=f)
+                self._paths[key] = path
+                self._evict()
+            self._paths.move_to_end(key)
+            with open(path, "rb") as f:
+                return f.read()
+
+    def clear(self):
+        """Xóa mọi file tạm"""
+        with self._lock:
+            while self._paths:
+                _, path = self._paths.popitem()
+                _remove_file(path)
+
+    def _evict(self):
+        while len(self._paths) > self.max_items:
+            _, old_path = self._paths.popitem(last=False)
+            _remove_file(old_path)
+
+
+def _remove_file(path):
+    try: os.remove(path)
+    except OSError: pass
@@ -0,0 +1,174 @@
+"""
+In HTML (template/index.jinja2) ra PDF bằng Chromium headless (Playwright).
+Giữ 1 trình duyệt "ấm" dùng lại cho nhiều đề, in song song trên 1 nhóm tab
+-> không tốn vài giây khởi động Chromium cho mỗi file.
+HTML nạp thẳng từ bộ nhớ (không ghi file .html); ảnh trỏ tới ASSET_ORIGIN và được trả
+từ asset map của từng đề (đường dẫn file hoặc bytes).
+"""
+import asyncio
+import mimetypes
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import quote, unquote
+
+# Lề để 0 vì đã chỉnh trong CSS @page (CSS mạnh hơn)
+PDF_OPTIONS = {
+    "format": "A4",
+    "print_background": True,  # In cả màu nền (nếu có)
+    "margin": {"top": "0cm", "bottom": "0cm", "left": "0cm", "right": "0cm"},
+}
+DEFAULT_PAGES = 4
+# Chờ ảnh tối đa bao lâu (giây) cho 1 đề - quá hạn thì báo lỗi file đó, tab dùng tiếp cho đề sau
+IMAGES_TIMEOUT = 30
+
+# Gốc URL ảo cho ảnh trong HTML: request tới đây được trả từ asset map, không qua mạng/đĩa tùy tiện
+ASSET_ORIGIN = "http://quiz-assets.local/"
+
+# Chờ mọi <img> tải xong (hoặc lỗi) thay cho "networkidle" (đợi mạng im 500ms)
+IMAGES_READY_JS = """
+() => Promise.all(Array.from(document.images, img => img.complete ? null :
+    new Promise(resolve => { img.onload = img.onerror = resolve; })))
+"""
+
+# Đã kiểm tra/cài Chromium trong process này chưa
+_browsers_ready = False
+
+
+def _ensure_chromium(executable_path):
+    """Cài Chromium nếu chưa có - chỉ kiểm tra 1 lần mỗi process, đã có file chạy thì không gọi subprocess"""
+    global _browsers_ready
+    if _browsers_ready:
+        return
+    if not os.path.exists(executable_path):
+        print(">>> Chưa có Chromium, đang cài (chỉ lần đầu)...")
+        subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+    _browsers_ready = True
+
+
+def asset_url(name):
+    """URL của ảnh name trong HTML (được trả từ asset map khi in)"""
+    return ASSET_ORIGIN + quote(name)
+
+
+class HtmlPdfRenderer:
+    """
+    Trình duyệt Chromium giữ mở suốt vòng đời object, pages tab in song song.
+        with HtmlPdfRenderer(pages=4) as renderer:
+            results = renderer.render([(html, pdf_path, assets), ...])
+    Gọi render() bao nhiêu lần cũng dùng lại trình duyệt đã mở.
+    """
+
+    def __init__(self, pages=DEFAULT_PAGES):
+        self.pages = max(1, pages)
+        self._loop = None
+        self._pw = None
+        self._browser = None
+        self._tabs = []
+        # Asset map của đề đang in trên từng tab: {tên ảnh: đường dẫn | bytes}
+        self._assets = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self._browser is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._start())
+
+    async def _start(self):
+        # Import muộn: playwright chỉ nạp khi thật sự in PDF
+        from playwright.async_api import async_playwright
+        self._pw = await async_playwright().start()
+        _ensure_chromium(self._pw.chromium.executable_path)
+        self._browser = await self._pw.chromium.launch()
+        self._tabs = [await self._browser.new_page() for _ in range(self.pages)]
+        for tab in self._tabs:
+            await tab.route(ASSET_ORIGIN + "**", self._asset_handler(tab))
+
+    def _asset_handler(self, tab):
+        async def handle(route):
+            name = unquote(route.request.url[len(ASSET_ORIGIN):])
+            asset = self._assets.get(id(tab), {}).get(name)
+            # Không có trong map / file không tồn tại -> <img> báo lỗi ngay, không treo chờ
+            if asset is None or (not isinstance(asset, bytes) and not os.path.isfile(asset)):
+                await route.abort()
+                return
+            try:
+                if isinstance(asset, bytes):
+                    await route.fulfill(body=asset, content_type=mimetypes.guess_type(name)[0] or "image/png")
+                else:
+                    await route.fulfill(path=asset)
+            except Exception:
+                # Đọc file lỗi giữa chừng: request phải được kết thúc, nếu không trang chờ mãi
+                await route.abort()
+        return handle
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self._close())
+        finally:
+            self._loop.close()
+            self._loop = self._pw = self._browser = None
+            self._tabs = []
+            self._assets = {}
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+
+    def render(self, jobs):
+        """
+        jobs: list (html, pdf_path, assets) - html là chuỗi, assets {tên ảnh: đường dẫn | bytes} hoặc None.
+        Trả về list (theo thứ tự jobs):
+          {"pdf": đường dẫn, "seconds": thời gian in, "error": None | thông báo lỗi}
+        Lỗi 1 file không làm dừng các file khác.
+        """
+        self.start()
+        return self._loop.run_until_complete(self._render_all(list(jobs)))
+
+    async def _render_all(self, jobs):
+        queue = asyncio.Queue()
+        for i, job in enumerate(jobs):
+            queue.put_nowait((i, job))
+        results = [None] * len(jobs)
+
+        async def worker(tab):
+            while not queue.empty():
+                i, (html, pdf_path, assets) = queue.get_nowait()
+                t0 = time.perf_counter()
+                error = None
+                try:
+                    await self._render_one(tab, html, pdf_path, assets)
+                except Exception as e:
+                    error = str(e)
+                results[i] = {"pdf": pdf_path, "seconds": time.perf_counter() - t0, "error": error}
+
+        await asyncio.gather(*(worker(tab) for tab in self._tabs))
+        return results
+
+    async def _render_one(self, tab, html, pdf_path, assets):
+        self._assets[id(tab)] = assets or {}
+        try:
+            await tab.set_content(html, wait_until="domcontentloaded")
+            try:
+                await asyncio.wait_for(tab.evaluate(IMAGES_READY_JS), IMAGES_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"ảnh chưa tải xong sau {IMAGES_TIMEOUT}s") from None
+            await tab.pdf(path=pdf_path, **PDF_OPTIONS)
+        finally:
+            self._assets.pop(id(tab), None)
+
+
+def throughput_per_minute(n_docs, seconds):
+    """Số đề/phút (0 nếu chưa đo được)"""
+    return n_docs / seconds * 60 if seconds > 0 else 0.0
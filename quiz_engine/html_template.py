@@ -0,0 +1,112 @@
+"""
+Render template/index.jinja2 (taode2 + preview) với ngữ cảnh dùng chung:
+Environment + template biên dịch 1 lần (bytecode cache trên đĩa cho lần chạy sau),
+ảnh nhúng dạng data URI dựng 1 lần cho mỗi nội dung ảnh.
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+from collections import OrderedDict
+
+from quiz_engine.cache import CACHE_DIR_ENV, DEFAULT_CACHE_DIR
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(ROOT_DIR, "template")
+TEMPLATE_NAME = "index.jinja2"
+# Khối 1 câu hỏi (index.jinja2 include lại; preview render riêng từng câu)
+QUESTION_TEMPLATE_NAME = "question.jinja2"
+# Số data URI giữ trong RAM (LRU) - preview chạy lâu, sửa ảnh bao nhiêu lần cũng không phình mãi
+MAX_DATA_URIS = 256
+
+
+class HtmlRenderContext:
+    """
+    auto_reload=False (in hàng loạt): template cố định sau lần nạp đầu.
+    auto_reload=True (preview): mỗi lần render kiểm tra mtime, chỉ biên dịch lại file đã sửa.
+    max_data_uris: số data URI nhớ tối đa (LRU); mỗi file ảnh chỉ nhớ hash của bản mới nhất.
+    """
+
+    def __init__(self, template_dir=TEMPLATE_DIR, template_name=TEMPLATE_NAME, auto_reload=False, cache_dir=None,
+                 max_data_uris=MAX_DATA_URIS):
+        # Import muộn: jinja2 chỉ nạp khi thật sự render HTML
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR, "jinja")
+        bytecode_cache = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        except OSError:
+            pass  # không ghi được cache -> vẫn chạy, chỉ biên dịch lại mỗi lần khởi động
+
+        self.template_name = template_name
+        self.auto_reload = auto_reload
+        self.env = Environment(loader=FileSystemLoader(template_dir), autoescape=True,
+                               bytecode_cache=bytecode_cache, auto_reload=auto_reload)
+        self._templates = {}
+        self.max_data_uris = max_data_uris
+        self._uri_by_hash = OrderedDict()
+        # {đường dẫn thật: (mtime_ns, size, hash)} - file đổi thì ghi đè, không giữ hash bản cũ
+        self._hash_by_file = OrderedDict()
+
+    def get_template(self, name=None):
+        name = name or self.template_name
+        template = self._templates.get(name)
+        if template is None or self.auto_reload:
+            template = self._templates[name] = self.env.get_template(name)
+        return template
+
+    def render(self, questions, **extra):
+        return self.get_template().render(questions=questions, **extra)
+
+    def render_question(self, item, number):
+        """HTML 1 câu hỏi (question.jinja2) - dùng để render lại riêng câu đã đổi"""
+        return self.get_template(QUESTION_TEMPLATE_NAME).render(item=item, number=number)
+
+    def data_uri(self, source, name=None):
+        """
+        Ảnh -> "data:<mime>;base64,...", nhớ theo SHA-256 nội dung.
+        source: đường dẫn file (đọc lại chỉ khi file đổi: khác mtime/size) hoặc bytes.
+        Trả về None nếu không đọc được file.
+        """
+        if isinstance(source, bytes):
+            data, digest = source, hashlib.sha256(source).hexdigest()
+        else:
+            try:
+                st = os.stat(source)
+            except OSError:
+                return None
+            real = os.path.realpath(source)
+            known, data = self._hash_by_file.get(real), None
+            if known is not None and known[:2] == (st.st_mtime_ns, st.st_size):
+                digest = known[2]
+                self._hash_by_file.move_to_end(real)
+            else:
+                with open(source, "rb") as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                self._hash_by_file[real] = (st.st_mtime_ns, st.st_size, digest)
+                _trim(self._hash_by_file, self.max_data_uris)
+            name = name or source
+
+        uri = self._uri_by_hash.get(digest)
+        if uri is not None:
+            self._uri_by_hash.move_to_end(digest)
+            return uri
+        if data is None:
+            # URI đã bị đẩy khỏi LRU nhưng file không đổi -> đọc lại
+            with open(source, "rb") as f:
+                data = f.read()
+        mime = mimetypes.guess_type(name or "")[0] or "image/png"
+        uri = f"data:{mime};base64," + base64.b64encode(data).decode("ascii")
+        self._uri_by_hash[digest] = uri
+        _trim(self._uri_by_hash, self.max_data_uris)
+        return uri
+
+
+def _trim(lru, max_items):
+    """Bỏ phần tử dùng lâu nhất của OrderedDict cho tới khi còn max_items"""
+    while len(lru) > max_items:
+        lru.popitem(last=False)
@@ -0,0 +1,72 @@
+import io
+
+# Định dạng trình duyệt / Word / taode2 hiển thị được trực tiếp -> giữ nguyên bytes gốc
+WEB_EXTS = {"png", "jpeg", "jpg", "gif"}
+
+
+class ImageRef:
+    """
+    Ảnh trong PDF, chỉ giữ bytes gốc (chưa giải mã).
+    xref: số hiệu object trong PDF (cùng xref = cùng 1 ảnh, vd logo lặp mỗi trang)
+    ext: định dạng gốc do PyMuPDF trả về ("png", "jpeg", "jpx", ...)
+    """
+    __slots__ = ("xref", "ext", "data")
+
+    def __init__(self, xref, ext, data):
+        self.xref = xref
+        self.ext = ext
+        self.data = data
+
+    def __repr__(self):
+        return f"ImageRef(xref={self.xref}, ext={self.ext!r}, {len(self.data)} bytes)"
+
+    @property
+    def out_ext(self):
+        """Đuôi file khi xuất: giữ định dạng gốc nếu phổ biến, còn lại đổi sang PNG"""
+        return self.ext if self.ext in WEB_EXTS else "png"
+
+    def open(self):
+        """Giải mã thành PIL.Image (chỉ gọi khi thật sự cần pixel)"""
+        from PIL import Image
+        return Image.open(io.BytesIO(self.data))
+
+    def encoded(self):
+        """Bytes để lưu/hiển thị theo out_ext; không nén lại nếu đã là PNG/JPEG"""
+        if self.ext in WEB_EXTS:
+            return self.data
+        buf = io.BytesIO()
+        self.open().save(buf, format="PNG")
+        return buf.getvalue()
+
+
+def image_names(img_map):
+    """
+    Tên file cho từng ảnh: {q_id: [tên, ...]} theo đúng thứ tự trong img_map.
+    Ảnh trùng xref (logo lặp mỗi trang) dùng chung 1 tên -> chỉ lưu 1 file.
+    """
+    names = {}
+    by_xref = {}
+    for q_id, imgs in img_map.items():
+        names[q_id] = name_images(q_id, imgs, by_xref)
+    return names
+
+
+def name_images(q_id, imgs, by_xref):
+    """Tên file cho ảnh của 1 câu; by_xref ({xref: tên}) dùng chung giữa các câu, được cập nhật tại chỗ"""
+    q_names = []
+    for idx, img in enumerate(imgs):
+        if img.xref not in by_xref:
+            by_xref[img.xref] = f"image_q{q_id}_{idx+1}.{img.out_ext}"
+        q_names.append(by_xref[img.xref])
+    return q_names
+
+
+def iter_unique_images(img_map):
+    """Duyệt (tên file, ImageRef) mỗi ảnh đúng 1 lần"""
+    names = image_names(img_map)
+    seen = set()
+    for q_id, imgs in img_map.items():
+        for img, name in zip(imgs, names[q_id]):
+            if name not in seen:
+                seen.add(name)
+                yield name, img
@@ -0,0 +1,100 @@
+import importlib.util
+from collections import Counter
+from operator import itemgetter
+
+# NumPy là tùy chọn, chỉ import khi thật sự gom dòng bằng NumPy
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Từ lệch Y so với từ trước < 5px -> cùng dòng
+LINE_Y_TOLERANCE = 5
+# Trang ít từ hơn thế này thì bản Python thuần nhanh hơn (chi phí tạo mảng)
+NUMPY_MIN_WORDS = 500
+
+# Mảng có cấu trúc cho các tuple của page.get_text("words")
+WORD_DTYPE = [("x0", "f8"), ("y0", "f8")]
+
+
+def _indent_spaces(line_x0, base_margin):
+    """Thụt đầu dòng: mỗi 6px = 1 khoảng trắng, bỏ qua lệch <= 10px"""
+    indent_pixel = line_x0 - base_margin
+    return int(indent_pixel / 6.0) if indent_pixel > 10 else 0
+
+
+def group_lines(words):
+    """
+    Gom từ thành dòng (bản Python thuần).
+    words: list tuple (x0, y0, x1, y1, text, ...) của page.get_text("words")
+    Trả về (lines, indents): lines là list các dòng (list từ, đã sort theo X),
+    indents là số khoảng trắng thụt đầu của từng dòng.
+    """
+    # Sort ban đầu: Y trước, X sau
+    words = sorted(words, key=lambda w: (w[1], w[0]))
+
+    # --- THUẬT TOÁN GOM DÒNG (LINE GROUPING) ---
+    lines = []
+    if words:
+        current_line = [words[0]]
+        for w in words[1:]:
+            if abs(w[1] - current_line[-1][1]) < LINE_Y_TOLERANCE:
+                current_line.append(w)
+            else:
+                lines.append(current_line)
+                current_line = [w]
+        lines.append(current_line)
+
+    # Sort lại từng dòng theo X (từ trái qua phải)
+    for line in lines:
+        line.sort(key=lambda w: w[0])
+
+    # --- TÍNH TOÁN LỀ TRÁI (BASE MARGIN) ---
+    line_starters = [round(line[0][0]) for line in lines if line]
+    base_margin = Counter(line_starters).most_common(1)[0][0] if line_starters else 0
+
+    return lines, [_indent_spaces(line[0][0], base_margin) for line in lines]
+
+
+def group_lines_numpy(words):
+    """
+    Gom từ thành dòng bằng NumPy, kết quả giống hệt group_lines.
+    Sort (Y, X), cắt dòng theo khoảng cách Y, sort X trong dòng và
+    tìm lề trái phổ biến nhất đều làm trên mảng.
+    """
+    if not words:
+        return [], []
+    import numpy as np
+
+    n = len(words)
+    arr = np.empty(n, dtype=WORD_DTYPE)
+    arr["x0"] = np.fromiter(map(itemgetter(0), words), dtype="f8", count=n)
+    arr["y0"] = np.fromiter(map(itemgetter(1), words), dtype="f8", count=n)
+    x0, y0 = arr["x0"], arr["y0"]
+
+    # Sort theo Y (ổn định). Không cần X phụ: thứ tự trong dòng được sort lại theo X
+    # bên dưới, từ trùng cả X lẫn Y vẫn giữ thứ tự gốc như sorted()
+    order = np.argsort(y0, kind="stable")
+    y_sorted = y0[order]
+
+    # Cắt dòng tại chỗ 2 từ liên tiếp lệch Y >= 5px
+    breaks = np.flatnonzero(np.abs(np.diff(y_sorted)) >= LINE_Y_TOLERANCE) + 1
+    line_ids = np.zeros(n, dtype=np.intp)
+    line_ids[breaks] = 1
+    line_ids = np.cumsum(line_ids)
+
+    # Sort X trong từng dòng (ổn định, giữ thứ tự (Y, X) khi trùng X)
+    order = order[np.lexsort((x0[order], line_ids))]
+
+    # Lề trái: mode của round(x0 từ đầu dòng), trùng số lần thì lấy lề xuất hiện trước
+    starts = np.concatenate(([0], breaks))
+    first_x = x0[order[starts]]
+    starters = np.round(first_x)
+    values, first_seen, counts = np.unique(starters, return_index=True, return_counts=True)
+    top = np.flatnonzero(counts == counts.max())
+    base_margin = values[top[np.argmin(first_seen[top])]]
+
+    indent_pixel = first_x - base_margin
+    indents = np.where(indent_pixel > 10, (indent_pixel / 6.0).astype(np.intp), 0).tolist()
+
+    ordered = list(map(words.__getitem__, order.tolist()))
+    bounds = starts.tolist() + [n]
+    lines = [ordered[bounds[k]:bounds[k + 1]] for k in range(len(starts))]
+    return lines, indents
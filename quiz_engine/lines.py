@@ -0,0 +1,20 @@
+from collections import namedtuple
+
+# 1 dòng text đã trích xuất (thay cho việc cộng dồn chuỗi theo trang/tài liệu)
+#   page   : số trang (từ 0)
+#   y      : tọa độ đỉnh dòng (dùng khi gán ảnh)
+#   indent : số dấu cách thụt đầu dòng
+#   text   : các từ của dòng nối bằng 1 dấu cách (đáp án gạch chân đã thành [[A]])
+#   q_id   : số câu nếu dòng mở đầu "Câu X", ngược lại None
+LineRecord = namedtuple("LineRecord", "page y indent text q_id")
+
+
+def line_text(rec):
+    """Dạng text của 1 dòng; dòng "Câu X" thêm 2 dấu xuống dòng phía trước để tách câu"""
+    prefix = "\n\n" if rec.q_id is not None else "\n"
+    return prefix + " " * rec.indent + rec.text
+
+
+def join_lines(records):
+    """Ghép toàn bộ dòng thành văn bản (1 lần join duy nhất)"""
+    return "".join(map(line_text, records))
@@ -0,0 +1,24 @@
+import sys
+
+
+def peak_rss_mb(include_children=False):
+    """
+    RAM đỉnh (MB) của process hiện tại - dùng để đặt giới hạn RAM cho container.
+    include_children: tính cả process con đã kết thúc (worker của process pool), lấy giá trị lớn nhất.
+    Trả về None nếu không đo được (Windows chưa cài psutil).
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except Exception:
+            return None
+
+    # ru_maxrss: Linux tính bằng KB, macOS tính bằng byte
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / 2**20
@@ -0,0 +1,159 @@
+import random
+from array import array
+from collections.abc import Mapping
+
+# ==========================================
+# LOGIC TRỘN ĐỀ (không phụ thuộc thư viện ngoài)
+# ==========================================
+# Một đề đã trộn = hoán vị trên ngân hàng câu hỏi gốc (dùng chung, không sửa, không copy):
+#   order      : câu thứ k trong đề là câu order[k] của ngân hàng
+#   opt_start  : đáp án của câu thứ k nằm ở opt_perm[opt_start[k]:opt_start[k + 1]]
+#   opt_perm   : đáp án thứ i trong đề là đáp án opt_perm[opt_start[k] + i] của câu gốc
+#   correct    : chỉ số đáp án đúng sau khi trộn
+# -> mỗi mã đề chỉ tốn vài mảng số nguyên O(N) thay vì deepcopy cả ngân hàng.
+
+
+class QuestionView(Mapping):
+    """Câu hỏi thứ pos của đề đã trộn, đọc như dict (q['question'], q.get('options', [])...)"""
+    __slots__ = ("_exam", "_pos")
+
+    def __init__(self, exam, pos):
+        self._exam = exam
+        self._pos = pos
+
+    def _keys(self):
+        exam = self._exam
+        keys = list(exam.bank[exam.order[self._pos]])
+        extra = ["display_id"]
+        if exam.opt_start is not None:
+            extra.append("options")
+            if self._correct() is not None:
+                extra.append("correct_answer_index")
+        return keys + [k for k in extra if k not in keys]
+
+    def _correct(self):
+        c = self._exam.correct[self._pos]
+        return None if c == _NO_ANSWER else c
+
+    def __getitem__(self, key):
+        exam = self._exam
+        k = self._pos
+        if key == "display_id":
+            return k + 1 if exam.renumber else exam.bank[exam.order[k]]['id']
+        if exam.opt_start is not None:
+            if key == "options":
+                opts = exam.bank[exam.order[k]].get('options', [])
+                return [opts[i] for i in exam.opt_perm[exam.opt_start[k]:exam.opt_start[k + 1]]]
+            if key == "correct_answer_index":
+                c = self._correct()
+                if c is not None:
+                    return c
+        return exam.bank[exam.order[k]][key]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"QuestionView({dict(self)!r})"
+
+
+# correct[k] khi câu không có đáp án đúng để trộn theo (giữ nguyên giá trị trong ngân hàng, nếu có)
+_NO_ANSWER = -2
+
+
+class MixedExam:
+    """
+    Đề đã trộn dạng view trên ngân hàng gốc: duyệt/lấy chỉ số ra QuestionView.
+    Renderer dùng trực tiếp như list câu hỏi; cần list dict thật (lưu JSON...) thì gọi to_list().
+    """
+    __slots__ = ("bank", "order", "renumber", "opt_start", "opt_perm", "correct")
+
+    def __init__(self, bank, order, renumber, opt_start=None, opt_perm=None, correct=None):
+        self.bank = bank
+        self.order = order
+        self.renumber = renumber
+        self.opt_start = opt_start
+        self.opt_perm = opt_perm
+        self.correct = correct
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        return QuestionView(self, pos)
+
+    def __iter__(self):
+        return (QuestionView(self, pos) for pos in range(len(self.order)))
+
+    def to_list(self):
+        return [dict(q) for q in self]
+
+
+def mix_exam(bank, shuffle_questions=True, shuffle_options=True, balance_distribution=True,
+             seed=None, rng=None):
+    """
+    Trộn đề, trả về MixedExam (view, không copy câu hỏi). Cùng seed -> cùng đề như mix_exam_data.
+    seed / rng: nguồn ngẫu nhiên riêng (random.Random); không truyền: dùng module random toàn cục.
+    """
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
+    total_q = len(bank)
+    order = list(range(total_q))
+    if shuffle_questions:
+        rng.shuffle(order)
+    exam = MixedExam(bank, array('I', order), shuffle_questions)
+    if not shuffle_options:
+        return exam
+
+    target_indices = []
+    if balance_distribution:
+        base = [0, 1, 2, 3]
+        repeats = (total_q // 4) + 1
+        pool = (base * repeats)[:total_q]
+        rng.shuffle(pool)
+        target_indices = pool
+
+    opt_start = array('I', [0])
+    opt_perm = array('H')
+    correct = array('h')
+    for idx, src in enumerate(order):
+        q = bank[src]
+        n_opts = len(q.get('options', []))
+        correct_idx = q.get('correct_answer_index', -1)
+
+        if n_opts == 4 and correct_idx != -1:
+            distractors = [i for i in range(4) if i != correct_idx]
+            rng.shuffle(distractors)
+            new_correct_idx = target_indices[idx] if balance_distribution else rng.randint(0, 3)
+            distractors.insert(new_correct_idx, correct_idx)
+            perm = distractors
+            correct.append(new_correct_idx)
+        else:
+            perm = list(range(n_opts))
+            rng.shuffle(perm)
+            correct.append(perm.index(correct_idx) if 0 <= correct_idx < n_opts else _NO_ANSWER)
+        opt_perm.extend(perm)
+        opt_start.append(len(opt_perm))
+
+    exam.opt_start, exam.opt_perm, exam.correct = opt_start, opt_perm, correct
+    return exam
+
+
+def mix_exam_data(original_questions, shuffle_questions=True, shuffle_options=True, balance_distribution=True,
+                  seed=None, rng=None):
+    """
+    Như mix_exam nhưng trả về list dict (tương thích code cũ).
+    seed / rng: nguồn ngẫu nhiên riêng (random.Random) -> cùng seed + cùng đầu vào = cùng đề.
+    Không truyền gì: dùng module random toàn cục như cũ.
+    """
+    return mix_exam(original_questions, shuffle_questions, shuffle_options, balance_distribution,
+                    seed=seed, rng=rng).to_list()
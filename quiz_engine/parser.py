@@ -0,0 +1,172 @@
+import itertools
+import re
+
+from quiz_engine.images import image_names, name_images
+from quiz_engine.lines import line_text
+
+# --- REGEX BIÊN DỊCH SẴN ---
+
+# 1 lần quét duy nhất. Mọi token đều mở đầu bằng 1 ký tự trắng:
+#   q   : ranh giới câu hỏi = xuống dòng + khoảng trắng, ngay trước "Câu X:" / "Câu X."
+#         (ranh giới ở đầu văn bản chỉ tạo block rỗng nên không cần bắt)
+#   opt : marker đáp án = khoảng trắng + (A hoặc [[A]]) + (dấu chấm hoặc đóng ngoặc)
+#         nhóm opt bắt đầu tại chữ cái (không tính khoảng trắng phía trước)
+TOKEN_RE = re.compile(
+    r'[\s](?:(?<=\n)(?P<q>)\s*(?=Câu\s+\d+[:\.])'
+    r'|(?P<opt>(?:\[\[(?P<correct>[A-D])\]\]|(?P<plain>[A-D]))[\.\)]))'
+)
+# Số câu ở đầu block
+Q_NUM_RE = re.compile(r'Câu\s+(\d+)')
+# Tiêu đề "Câu X:" cần xóa khỏi nội dung câu hỏi
+Q_HEAD_RE = re.compile(r'Câu\s+\d+[:\.]?\s*')
+NON_SPACE_RE = re.compile(r'\S')
+
+
+def normalize_text(text):
+    """Làm sạch văn bản, xử lý các ký tự ẩn"""
+    if not text: return ""
+    # Thay thế các ký tự space đặc biệt thành space thường
+    return text.replace('\xa0', ' ').replace('\u200b', '').replace('\t', ' ')
+
+
+def _build_question(text, start, end, markers, img_names):
+    """
+    Dựng question_obj cho block text[start:end] (chưa strip).
+    markers: [(chữ cái, có gạch chân?, vị trí chữ cái, vị trí kết thúc marker)]
+    Trả về None nếu block không mở đầu bằng "Câu X".
+    """
+    # Strip block bằng chỉ số, không cắt chuỗi
+    m = NON_SPACE_RE.search(text, start, end)
+    if not m: return None
+    start = m.start()
+    while text[end - 1].isspace():
+        end -= 1
+
+    # Xác định ID câu hỏi
+    q_num_match = Q_NUM_RE.match(text, start, end)
+    if not q_num_match: return None
+    q_id = int(q_num_match.group(1))
+
+    # --- LOGIC TÁCH ĐÁP ÁN ---
+    # Cắt tại marker 'A' đầu tiên, các marker trước đó thuộc về câu hỏi
+    first_a = next((i for i, mk in enumerate(markers) if mk[0] == 'A'), -1)
+    split_idx = markers[first_a][2] if first_a != -1 else end
+
+    # --- CLEAN CÂU HỎI --- (xóa chữ "Câu X:" ở đầu)
+    head_end = Q_HEAD_RE.match(text, start, split_idx).end()
+
+    question_obj = {
+        "id": q_id,
+        "question": text[head_end:split_idx].strip(),
+        "options": [],
+        "correct_answer_index": -1,
+        "images": []
+    }
+
+    # --- PARSE OPTIONS ---
+    if first_a != -1:
+        opts = markers[first_a:]
+        parsed_opts = {"A":"", "B":"", "C":"", "D":""}
+        correct_char = None
+        for i, (char, is_correct, _, opt_end) in enumerate(opts):
+            if is_correct: correct_char = char
+            # Cắt text từ cuối marker này đến đầu marker kia
+            next_start = opts[i+1][2] if i < len(opts)-1 else end
+            parsed_opts[char] = text[opt_end:next_start].strip()
+
+        question_obj["options"] = [parsed_opts.get(k, "...") for k in "ABCD"]
+        if correct_char:
+            question_obj["correct_answer_index"] = ord(correct_char) - ord('A')
+
+    # Gán ảnh
+    if q_id in img_names:
+        question_obj["images"].extend(img_names[q_id])
+
+    return question_obj
+
+
+def iter_quiz_questions(raw_text, img_map):
+    """
+    Quét văn bản 1 lần, trả về lần lượt từng question_obj.
+    Token "q" đóng block hiện tại, token "opt" ghi lại vị trí marker trong block.
+    """
+    text = normalize_text(raw_text)
+    img_names = image_names(img_map)
+
+    block_start = 0
+    markers = []
+    for tok in TOKEN_RE.finditer(text):
+        if tok.lastgroup == "q":
+            question_obj = _build_question(text, block_start, tok.start(), markers, img_names)
+            if question_obj: yield question_obj
+            block_start = tok.end()
+            markers = []
+        else:
+            correct = tok.group("correct")
+            markers.append((correct or tok.group("plain"), correct is not None, tok.start("opt"), tok.end()))
+
+    question_obj = _build_question(text, block_start, len(text), markers, img_names)
+    if question_obj: yield question_obj
+
+
+def iter_questions_from_records(records, img_map):
+    """
+    Như iter_quiz_questions nhưng đọc thẳng LineRecord (vd từ iter_pdf_lines), không cần
+    ghép cả văn bản; trả về câu hỏi ngay khi câu kế tiếp bắt đầu.
+    """
+    return iter_questions_from_lines(map(line_text, records), img_map)
+
+
+def iter_questions_from_lines(lines, img_map):
+    """
+    Như iter_quiz_questions nhưng đọc dần từng đoạn text (mỗi đoạn mở đầu bằng xuống dòng),
+    trả về câu hỏi ngay khi câu kế tiếp bắt đầu; chỉ giữ text của câu đang mở.
+    img_map có thể đang được điền dần: ảnh của 1 câu được lấy lúc câu đó đóng.
+    Token bắt đầu ở dòng cuối cùng đã đọc chờ thêm 1 dòng mới chốt
+    (tiêu đề có thể bị ngắt dòng giữa "Câu" và "5:").
+    """
+    by_xref = {}
+    buf = ""           # text từ đầu câu đang mở
+    block_start = 0
+    pos = 0            # quét tiếp từ đây (cuối token đã chốt)
+    markers = []
+
+    def build(end):
+        question_obj = _build_question(buf, block_start, end, markers, {})
+        if question_obj and question_obj["id"] in img_map:
+            q_id = question_obj["id"]
+            question_obj["images"].extend(name_images(q_id, img_map[q_id], by_xref))
+        return question_obj
+
+    for line in itertools.chain(lines, [None]):
+        if line is None:
+            tail = len(buf) + 1  # hết dòng: chốt nốt mọi token còn lại
+        else:
+            tail = len(buf)
+            buf += normalize_text(line)
+        for tok in TOKEN_RE.finditer(buf, pos):
+            if tok.start() >= tail:
+                break
+            if tok.lastgroup == "q":
+                question_obj = build(tok.start())
+                if question_obj: yield question_obj
+                block_start = tok.end()
+                markers = []
+            else:
+                correct = tok.group("correct")
+                markers.append((correct or tok.group("plain"), correct is not None, tok.start("opt"), tok.end()))
+            pos = tok.end()
+
+        # Bỏ text các câu đã đóng, dời vị trí về đầu câu đang mở
+        if block_start:
+            buf = buf[block_start:]
+            pos -= block_start
+            markers = [(c, ok, s - block_start, e - block_start) for c, ok, s, e in markers]
+            block_start = 0
+
+    question_obj = build(len(buf))
+    if question_obj: yield question_obj
+
+
+def parse_quiz_json_v18(raw_text, img_map):
+    return list(iter_quiz_questions(raw_text, img_map))
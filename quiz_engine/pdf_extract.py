@@ -0,0 +1,378 @@
+import gc
+import os
+import re
+import shutil
+import tempfile
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+
+from quiz_engine.images import ImageRef
+from quiz_engine.layout import HAS_NUMPY, NUMPY_MIN_WORDS, group_lines, group_lines_numpy
+from quiz_engine.lines import LineRecord, join_lines
+from quiz_engine.profiling import NULL_TIMER, PageTimer
+from quiz_engine.underline import UnderlineIndex
+
+# Tăng khi đổi logic trích xuất -> cache cũ tự mất hiệu lực
+EXTRACTOR_VERSION = "v18.5"
+
+# Dưới số trang này chạy song song không bõ công khởi động process
+PARALLEL_MIN_PAGES = 16
+
+# Chế độ tiết kiệm RAM: số trang mỗi cửa sổ, hết cửa sổ thì xả cache MuPDF
+LOW_MEMORY_WINDOW = 32
+
+# --- PHẦN 1: CÔNG CỤ HÌNH HỌC ---
+
+def is_underlined(word_rect, drawings):
+    """
+    Kiểm tra gạch chân (Logic hình học)
+    word_rect: [x0, y0, x1, y1]
+    drawings: UnderlineIndex của trang (hoặc list đường kẻ, sẽ tự dựng index)
+    """
+    if not isinstance(drawings, UnderlineIndex):
+        drawings = UnderlineIndex(drawings)
+
+    wx0, _, wx1, _ = word_rect
+    # 1. Vertical Check: index chỉ trả về line nằm dưới tâm chữ, cách chân không quá 12px
+    for lx0, _, lx1, _ in drawings.candidates(word_rect):
+        # 2. Horizontal Check: Giao nhau ít nhất 2px
+        if min(wx1, lx1) > max(wx0, lx0) + 2:
+            return True
+    return False
+
+# --- PHẦN 2: XỬ LÝ TỪNG TRANG ---
+
+def extract_page(page, use_numpy=None, profile=False):
+    """
+    Trích xuất 1 trang, KHÔNG phụ thuộc trang trước.
+    Trả về:
+      - lines: [LineRecord] (xem quiz_engine.lines), chưa ghép thành chuỗi
+      - images: [(xref, bottom)] các ảnh chờ gán (đã sort theo y0)
+    Việc gán ảnh vào câu hỏi (cần current_q_id của trang trước) để cho merge_pages.
+    use_numpy: True/False ép chọn cách gom dòng; None = tự dùng NumPy cho trang dày chữ.
+    profile: True -> thêm "stats" (thời gian + bộ đếm từng bước, xem PipelineProfile.add_page).
+    """
+    timer = PageTimer() if profile else NULL_TIMER
+
+    # --- A. LẤY ẢNH & ĐƯỜNG KẺ ---
+    image_infos = page.get_image_info(xrefs=True)
+    image_infos.sort(key=lambda x: x['bbox'][1])
+    pending_images = [(img['xref'], img['bbox'][3]) for img in image_infos if (img['bbox'][3] - img['bbox'][1]) > 20]
+    timer.lap("images")
+    timer.count("images", len(pending_images))
+
+    drawings = []
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] == "l": # Line
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) < 2:
+                    drawings.append([min(p1.x, p2.x), min(p1.y, p2.y), max(p1.x, p2.x), max(p1.y, p2.y)])
+            elif item[0] == "re": # Rect
+                r = item[1]
+                if abs(r.height) < 5:
+                    drawings.append([r.x0, r.y0, r.x1, r.y1])
+    # Dựng chỉ mục 1 lần cho cả trang
+    underline_index = UnderlineIndex(drawings)
+    timer.lap("drawings")
+    timer.count("drawings", len(drawings))
+
+    # --- C. LẤY TEXT & XỬ LÝ DÒNG THÔNG MINH ---
+    words = page.get_text("words")
+    timer.lap("words")
+    timer.count("words", len(words))
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY and len(words) >= NUMPY_MIN_WORDS
+    lines, indents = group_lines_numpy(words) if use_numpy else group_lines(words)
+    timer.lap("group_lines")
+    timer.count("lines", len(lines))
+
+    # --- BẮT ĐẦU QUÉT TEXT ---
+    out_lines = []
+
+    for line, num_spaces in zip(lines, indents):
+        line_text_parts = []
+
+        # Kiểm tra xem dòng này có bắt đầu bằng "Câu X" không
+        # Nếu có, q_id != None -> line_text thêm \n\n phía trước để tách biệt hoàn toàn
+        first_word_text = line[0][4]
+        q_id = None
+        if first_word_text == "Câu" and len(line) > 1:
+            if re.match(r'^\d+[:\.]?$', line[1][4]):
+                # Ghi lại ID, merge_pages sẽ cập nhật current_q_id
+                try:
+                    q_id = int(re.sub(r'\D', '', line[1][4]))
+                except: pass
+
+        # Xử lý từng từ trong dòng
+        for w in line:
+            text = w[4]
+            rect = [w[0], w[1], w[2], w[3]]
+
+            # Check Gạch chân (Đáp án đúng)
+            # Regex bắt: A. hoặc A) hoặc (A)
+            if re.match(r'^[\(]?[A-D][\.\)]?$', text):
+                # Lấy ký tự cái (A, B, C, D)
+                clean_char = re.search(r'[A-D]', text).group(0)
+                timer.count("markers")
+                if is_underlined(rect, underline_index):
+                    text = text.replace(clean_char, f"[[{clean_char}]]")
+                    timer.count("underlined")
+
+            line_text_parts.append(text)
+
+        # Thụt đầu dòng (num_spaces) đã tính khi gom dòng; dấu xuống dòng thêm lúc ghép (line_text)
+        # Tọa độ Y của dòng dùng khi gán ảnh
+        out_lines.append(LineRecord(page.number, line[0][1], num_spaces, " ".join(line_text_parts), q_id))
+    # Dò đáp án gạch chân + dựng text các dòng
+    timer.lap("markers")
+
+    result = {"lines": out_lines, "images": pending_images}
+    if profile:
+        result["stats"] = timer.result(page.number)
+    return result
+
+def iter_merged_lines(page_results, load_image, img_map, page_stats=None):
+    """
+    Ghép kết quả các trang THEO THỨ TỰ, mang current_q_id qua ranh giới trang
+    và gán ảnh y hệt bản chạy tuần tự. Trả về lần lượt LineRecord từng dòng.
+    img_map ({q_id: [ImageRef]}) được điền dần: ảnh gán theo 1 dòng có trong img_map trước khi dòng đó được trả về.
+    load_image(xref) -> ImageRef (lỗi thì raise, ảnh bị bỏ qua)
+    page_stats: list (tùy chọn) nhận thống kê ảnh từng trang
+        {"page", "images", "assigned", "leftover"} - leftover = ảnh bị bỏ vì không dòng nào nhận
+    """
+    current_q_id = 0
+
+    def add_image(q_id, xref):
+        try:
+            img_ref = load_image(xref)
+            if q_id not in img_map:
+                img_map[q_id] = []
+            img_map[q_id].append(img_ref)
+        except: pass
+
+    images, by_bottom, done, stats = [], [], 0, None
+    for page_no, page_res in enumerate(page_results):
+        # Ảnh chưa gán của trang trước bị bỏ (giữ nguyên hành vi cũ)
+        images = page_res["images"]  # đã sort theo y0 = thứ tự gán khi nhiều ảnh cùng đủ điều kiện
+        # Quét theo đáy ảnh tăng dần: ảnh đủ điều kiện ở 1 dòng luôn là đoạn đầu của by_bottom
+        by_bottom = sorted(range(len(images)), key=lambda i: images[i][1])
+        bottoms = [images[i][1] for i in by_bottom]
+        done = 0  # by_bottom[:done] đã gán
+        stats = {"page": page_no, "images": len(images), "assigned": 0, "leftover": len(images)}
+        if page_stats is not None:
+            page_stats.append(stats)
+
+        for rec in page_res["lines"]:
+            if rec.q_id is not None:
+                current_q_id = rec.q_id
+
+            # --- LOGIC GÁN ẢNH ---
+            # Nếu đáy ảnh nằm trên dòng này hoặc ngang dòng này (và đã có câu hỏi)
+            if current_q_id > 0 and done < len(bottoms):
+                end = bisect_right(bottoms, rec.y + 30, done)
+                if end > done:
+                    for i in sorted(by_bottom[done:end]):
+                        add_image(current_q_id, images[i][0])
+                    done = end
+                    stats["assigned"], stats["leftover"] = done, len(images) - done
+
+            yield rec
+
+    # Clean up ảnh còn sót lại ở cuối trang (chỉ trang cuối)
+    if done < len(images) and current_q_id > 0:
+        for i in sorted(by_bottom[done:]):
+            add_image(current_q_id, images[i][0])
+        stats["assigned"], stats["leftover"] = len(images), 0
+
+def merge_pages(page_results, load_image):
+    """Như iter_merged_lines nhưng gom hết: trả về (full_text, {q_id: [ImageRef, ...]})"""
+    extracted_images_map = {}
+    full_text = join_lines(iter_merged_lines(page_results, load_image, extracted_images_map))
+    return full_text, extracted_images_map
+
+# --- PHẦN 3: CHẾ ĐỘ SONG SONG (PROCESS POOL) ---
+
+_worker_doc = None
+_worker_use_numpy = None
+_worker_low_memory = False
+_worker_profile = False
+
+def _init_worker(source, use_numpy=None, low_memory=False, profile=False):
+    """Mỗi worker mở tài liệu 1 lần từ đường dẫn (PyMuPDF đọc dần từ file, xem _worker_source)"""
+    global _worker_doc, _worker_use_numpy, _worker_low_memory, _worker_profile
+    _worker_doc = _open_pdf(source)
+    _worker_use_numpy = use_numpy
+    _worker_low_memory = low_memory
+    _worker_profile = profile
+
+def _extract_page_range(page_range):
+    start, stop = page_range
+    results = [extract_page(_worker_doc[pno], _worker_use_numpy, _worker_profile) for pno in range(start, stop)]
+    if _worker_low_memory:
+        _release_caches()
+    return results
+
+def _open_pdf(source):
+    """source: bytes (mở từ RAM) hoặc đường dẫn (PyMuPDF đọc dần từ file)"""
+    # Import muộn: module này import được (vd lấy EXTRACTOR_VERSION) mà không cần nạp PyMuPDF
+    import fitz  # PyMuPDF
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+def _release_caches():
+    """Xả cache nội bộ của MuPDF (font, ảnh đã giải mã, ...) + các object Python đã bỏ"""
+    import fitz
+    fitz.TOOLS.store_shrink(100)
+    gc.collect()
+
+def _shard_pages(page_count, workers, max_chunk=None):
+    """Chia trang thành các đoạn liên tiếp (nhiều đoạn hơn số worker để cân tải)"""
+    chunk = max(1, -(-page_count // (workers * 4)))
+    if max_chunk:
+        chunk = min(chunk, max_chunk)
+    return [(s, min(s + chunk, page_count)) for s in range(0, page_count, chunk)]
+
+def _load_image_from(doc):
+    """Lấy bytes gốc của ảnh (không giải mã); mỗi xref chỉ đọc 1 lần, dùng chung ImageRef"""
+    loaded = {}
+    def load_image(xref):
+        if xref not in loaded:
+            base_img = doc.extract_image(xref)
+            loaded[xref] = ImageRef(xref, base_img["ext"], base_img["image"])
+        return loaded[xref]
+    return load_image
+
+def _real_path(file_stream):
+    """Đường dẫn nếu file_stream là file thật trên đĩa (open(...)), ngược lại None (BytesIO, UploadedFile)"""
+    try:
+        file_stream.fileno()
+        return os.path.abspath(file_stream.name)
+    except (AttributeError, TypeError, OSError, ValueError):
+        return None
+
+@contextmanager
+def _pdf_source(file_stream, low_memory):
+    """
+    Nguồn để mở PDF: bytes của cả file (mặc định), hoặc đường dẫn (low_memory).
+    low_memory: file thật thì mở thẳng, còn lại chép dần ra file tạm -> không giữ thêm 1 bản bytes trong RAM.
+    """
+    if not low_memory:
+        yield file_stream.read()
+        return
+    path = _real_path(file_stream)
+    if path:
+        yield path
+        return
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            shutil.copyfileobj(file_stream, tmp, 1 << 20)
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+@contextmanager
+def _worker_source(source):
+    """
+    Đường dẫn cho worker mở PDF: truyền bytes qua initargs thì mỗi worker nhận 1 bản copy
+    (RAM = số worker x cỡ file) -> bytes được ghi ra file tạm 1 lần, worker chỉ nhận đường dẫn.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            tmp.write(source)
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+def _iter_page_results(doc, source, workers=None, use_numpy=None, low_memory=False, profile=False):
+    """
+    Kết quả extract_page của từng trang, đúng thứ tự, có trang nào trả trang đó.
+    low_memory: xử lý theo cửa sổ LOW_MEMORY_WINDOW trang, xả cache MuPDF sau mỗi cửa sổ.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    window = LOW_MEMORY_WINDOW if low_memory else None
+
+    if workers and workers > 1 and doc.page_count >= PARALLEL_MIN_PAGES:
+        from concurrent.futures import ProcessPoolExecutor
+        shards = _shard_pages(doc.page_count, workers, window)
+        with _worker_source(source) as path:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                                       initializer=_init_worker, initargs=(path, use_numpy, low_memory, profile))
+            try:
+                # map trả kết quả theo thứ tự shard, shard nào xong trước vẫn phải chờ shard trước nó
+                for chunk in pool.map(_extract_page_range, shards):
+                    yield from chunk
+            finally:
+                # Người dùng bỏ dở (vd Streamlit rerun) -> hủy các shard chưa chạy
+                pool.shutdown(cancel_futures=True)
+    elif window:
+        for start in range(0, doc.page_count, window):
+            for pno in range(start, min(start + window, doc.page_count)):
+                page = doc.load_page(pno)
+                yield extract_page(page, use_numpy, profile)
+                del page
+            _release_caches()
+    else:
+        for page in doc:
+            yield extract_page(page, use_numpy, profile)
+
+def iter_pdf_lines(file_stream, img_map, workers=None, use_numpy=None, on_page=None, page_stats=None,
+                   low_memory=False, profile=None):
+    """
+    Trích xuất PDF theo luồng: trả về lần lượt LineRecord từng dòng ngay khi trang chứa nó xong,
+    join_lines(...) đúng bằng full_text của process_pdf_v18.
+    img_map: dict rỗng, được điền dần {q_id: [ImageRef, ...]}.
+    on_page(số trang đã xong, tổng số trang): gọi sau mỗi trang (để hiện tiến độ).
+    page_stats: list nhận thống kê gán ảnh từng trang (xem iter_merged_lines).
+    low_memory: chế độ tiết kiệm RAM cho PDF rất lớn (xem _pdf_source, _iter_page_results).
+    profile: PipelineProfile (tùy chọn) nhận thời gian + bộ đếm từng bước, từng trang.
+    """
+    t0 = time.perf_counter()
+    with _pdf_source(file_stream, low_memory) as source:
+        doc = _open_pdf(source)
+        try:
+            load_image = _load_image_from(doc)
+            if profile:
+                profile.add_time("pdf.open", time.perf_counter() - t0)
+                load_image = profile.timed("pdf.load_image", load_image)
+            page_results = _iter_page_results(doc, source, workers, use_numpy, low_memory, profile is not None)
+            if on_page or profile:
+                page_results = _report_pages(page_results, doc.page_count, on_page, profile)
+            yield from iter_merged_lines(page_results, load_image, img_map, page_stats)
+        finally:
+            doc.close()
+
+def _report_pages(page_results, page_count, on_page=None, profile=None):
+    for done, page_res in enumerate(page_results, 1):
+        if profile:
+            profile.add_page(page_res.pop("stats"))
+        yield page_res
+        if on_page:
+            on_page(done, page_count)
+
+def process_pdf_v18(file_stream, workers=None, use_numpy=None, low_memory=False, profile=None, page_stats=None):
+    """
+    Trích xuất text + ảnh từ PDF.
+    Trả về (full_text, {q_id: [ImageRef, ...]}) - ảnh giữ bytes gốc, chưa giải mã.
+    workers: None/1 = chạy tuần tự; >1 = chia trang cho process pool (0 = số CPU).
+    use_numpy: gom dòng bằng NumPy (None = tự chọn theo số từ/trang, xem extract_page).
+    low_memory: không nạp cả file vào RAM, xử lý theo cửa sổ trang (PDF rất lớn).
+    profile: PipelineProfile (tùy chọn), thêm giai đoạn "pdf" = tổng thời gian.
+    page_stats: list (tùy chọn) nhận thống kê ảnh từng trang - len(page_stats) = số trang.
+    Kết quả mọi chế độ giống hệt nhau.
+    """
+    img_map = {}
+    t0 = time.perf_counter()
+    full_text = join_lines(iter_pdf_lines(file_stream, img_map, workers, use_numpy,
+                                          page_stats=page_stats, low_memory=low_memory, profile=profile))
+    if profile:
+        profile.add_time("pdf", time.perf_counter() - t0)
+    return full_text, img_map
@@ -0,0 +1,96 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class PageTimer:
+    """Bấm giờ các bước trong 1 trang: lap(tên) = thời gian từ lần lap trước"""
+    __slots__ = ("seconds", "counts", "_last")
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.seconds[name] = self.seconds.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def result(self, page_no):
+        return {"page": page_no, "seconds": self.seconds, "counts": self.counts}
+
+
+class _NullTimer:
+    """Dùng khi không bật đo: mọi thao tác là no-op"""
+    __slots__ = ()
+
+    def lap(self, name): pass
+
+    def count(self, name, n=1): pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class PipelineProfile:
+    """
+    Thời gian + bộ đếm theo từng giai đoạn của pipeline (bật khi cần, truyền qua tham số profile=).
+      stages: {tên: {"seconds", "calls"}} - "page.*" là tổng các trang
+              (chế độ song song: cộng dồn trên mọi worker nên có thể lớn hơn thời gian thực)
+      counts: {"pages", "words", "drawings", "lines", "images", "markers", "underlined", ...}
+      pages : [{"page", "seconds": {...}, "counts": {...}}] từng trang
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.pages = []
+
+    def add_time(self, name, seconds, calls=1):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        stage["seconds"] += seconds
+        stage["calls"] += calls
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def timed(self, name, fn):
+        """Bọc fn để mỗi lần gọi được tính vào giai đoạn name"""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def add_page(self, page_result):
+        """Gộp kết quả PageTimer.result() của 1 trang"""
+        self.pages.append(page_result)
+        self.count("pages")
+        for name, seconds in page_result["seconds"].items():
+            self.add_time("page." + name, seconds)
+        for name, n in page_result["counts"].items():
+            self.count(name, n)
+
+    def report(self):
+        return {"stages": self.stages, "counts": self.counts, "pages": self.pages}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), ensure_ascii=False, indent=indent)
+
+    def summary_rows(self):
+        """Bảng tóm tắt (để hiển thị): giai đoạn lâu nhất trước"""
+        rows = [{"giai đoạn": name, "ms": round(s["seconds"] * 1000, 2), "lần gọi": s["calls"]}
+                for name, s in self.stages.items()]
+        rows.sort(key=lambda r: -r["ms"])
+        return rows
@@ -0,0 +1,231 @@
+import io
+import os
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import cm
+
+# ==========================================
+# 1. CẤU HÌNH FONT & HELPER
+# ==========================================
+
+# Thư mục fonts/ ở root dự án
+font_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts") + "/"
+
+def register_fonts():
+    """Đăng ký font Times New Roman cho PDF (thường, đậm, nghiêng)"""
+    font_regular = font_dir +'Times.ttf'
+    font_bold = font_dir + 'Timesbd.ttf' # Times New Roman Bold
+    font_italic = font_dir + 'Timesi.ttf'
+    
+    used_font = 'Helvetica' # Fallback
+    
+    try:
+        # Ưu tiên load Times New Roman
+        pdfmetrics.registerFont(TTFont('Times-Roman', font_regular))
+        used_font = 'Times-Roman'
+        
+        # Thử load thêm font đậm (nếu có)
+        try:
+            pdfmetrics.registerFont(TTFont('Times-Bold', font_bold))
+        except:
+            # Nếu không có file đậm, map font đậm về font thường (không khuyến khích)
+            pass
+
+        # Font nghiêng: <i> trong Paragraph dùng Times-Italic (bản Type1 có sẵn không có dấu tiếng Việt)
+        try:
+            pdfmetrics.registerFont(TTFont('Times-Italic', font_italic))
+        except:
+            pass
+            
+    except:
+        pass # Dùng mặc định nếu không tìm thấy file
+        
+    return used_font
+
+
+class RenderContext:
+    """
+    Font đã đăng ký + bộ style dùng chung cho mọi lần xuất PDF trong process.
+    Đọc file TTF và dựng style chỉ 1 lần (xem get_render_context()).
+    """
+
+    def __init__(self):
+        self.font_name = register_fonts()
+        self.font_bold_name = 'Times-Bold' if self.font_name == 'Times-Roman' else self.font_name # Fallback
+        styles = getSampleStyleSheet()
+
+        # Header Style
+        self.style_header_school = ParagraphStyle('HSchool', fontName=self.font_bold_name, fontSize=11, alignment=TA_CENTER)
+        self.style_header_exam = ParagraphStyle('HExam', fontName=self.font_bold_name, fontSize=12, alignment=TA_CENTER)
+
+        # Question Style (Size 13pt chuẩn)
+        self.style_q = ParagraphStyle('Quest', parent=styles['Normal'], fontName=self.font_name, fontSize=13, leading=16, spaceAfter=6, alignment=TA_JUSTIFY)
+        self.style_opt = ParagraphStyle('Opt', parent=styles['Normal'], fontName=self.font_name, fontSize=13, leading=16)
+        self.style_line = ParagraphStyle('Line', alignment=TA_CENTER)
+
+        self.header_table_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ])
+        self.options_table_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+        ])
+        self.key_table_style = TableStyle([('GRID', (0,0), (-1,-1), 0.5, colors.black), ('ALIGN', (0,0), (-1,-1), 'CENTER'), ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), ('FONTNAME', (0,0), (-1,-1), self.font_name)])
+
+
+_render_context = None
+
+
+def get_render_context():
+    """RenderContext dùng chung của process (tạo ở lần xuất PDF đầu tiên)"""
+    global _render_context
+    if _render_context is None:
+        _render_context = RenderContext()
+    return _render_context
+
+def format_text_pdf(text):
+    if not text: return ""
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text.replace('\n', '<br/>').replace('  ', '&nbsp;&nbsp;')
+
+# ==========================================
+# 2. XỬ LÝ PDF BOOKMARK (Heading cho PDF)
+# ==========================================
+
+class BookmarkCanvas(canvas.Canvas):
+    """
+    Canvas tùy chỉnh để tạo Bookmark (Heading) tự động trong PDF
+    """
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self._bookmarks = []
+
+    def add_bookmark(self, name, key):
+        self._bookmarks.append((name, key))
+    
+    # Hàm này sẽ được gọi mỗi khi flowable được vẽ (cần logic phức tạp hơn để gắn đúng vị trí)
+    # Tuy nhiên, để đơn giản cho Streamlit, ta sẽ dùng phương pháp addOutlineEntry trực tiếp trong loop
+
+# ==========================================
+# 3. TẠO PDF (CHUẨN VIỆT NAM + BOOKMARKS)
+# ==========================================
+
+def generate_pdf_bytes(questions, mode="exam"):
+    buffer = io.BytesIO()
+    
+    # 1. Cấu hình trang chuẩn: Lề trái 3cm, Phải/Trên/Dưới 2cm
+    doc = SimpleDocTemplate(buffer, pagesize=A4, 
+                            leftMargin=3*cm, rightMargin=2*cm, 
+                            topMargin=2*cm, bottomMargin=2*cm)
+    
+    story = []
+    # Font + style chuẩn: dựng 1 lần cho cả process
+    ctx = get_render_context()
+    style_q, style_opt = ctx.style_q, ctx.style_opt
+
+    # --- TẠO HEADER ---
+    # Bảng Header 2 cột: Sở/Trường bên trái, Tên thi bên phải
+    h_text_left = "SỞ GD&ĐT ........................<br/>TRƯỜNG THPT ........................"
+    h_text_right = f"<b>{'ĐỀ THI TRẮC NGHIỆM' if mode == 'exam' else 'ĐÁP ÁN'}</b><br/>Môn: Tin học"
+    
+    h_table = Table([[Paragraph(h_text_left, ctx.style_header_school), Paragraph(h_text_right, ctx.style_header_exam)]], 
+                    colWidths=[8*cm, 8*cm])
+    h_table.setStyle(ctx.header_table_style)
+    story.append(h_table)
+    story.append(Spacer(1, 0.5*cm))
+    # Kẻ đường ngang
+    story.append(Paragraph("_______________________________________", ctx.style_line))
+    story.append(Spacer(1, 1*cm))
+
+    if mode == "exam":
+        labels = ["A.", "B.", "C.", "D."]
+        
+        # Để tạo Bookmark, ta cần custom Canvas loop. 
+        # Cách đơn giản nhất trong SimpleDocTemplate là chèn Anchor.
+        
+        for q in questions:
+            # Tạo Anchor cho Bookmark
+            key = f"cau_{q['display_id']}"
+            q_text_content = format_text_pdf(q['question'])
+            
+            # Thẻ <a> ẩn để làm điểm neo bookmark (nâng cao)
+            # Hoặc đơn giản là in câu hỏi
+            full_q_text = f"<b>Câu {q['display_id']}:</b> {q_text_content}"
+            
+            # Đoạn văn câu hỏi
+            p = Paragraph(full_q_text, style_q)
+            story.append(p)
+            
+            # -- ĐÁP ÁN (LAYOUT A-C / B-D) --
+            opts = q.get('options', [])
+            clean_opts = [str(o) for o in opts]
+            opt_paras = []
+            for i, o_text in enumerate(clean_opts):
+                if i < 4:
+                    opt_paras.append(Paragraph(f"<b>{labels[i]}</b> {format_text_pdf(o_text)}", style_opt))
+
+            max_len = max([len(o) for o in clean_opts]) if clean_opts else 0
+            table_data = []
+            col_widths = []
+
+            # Logic chia cột
+            doc_width = A4[0] - 5*cm # Trừ lề trái 3 + phải 2
+            
+            if len(opt_paras) == 4 and max_len < 40:
+                row1 = [opt_paras[0], opt_paras[2]]
+                row2 = [opt_paras[1], opt_paras[3]]
+                table_data = [row1, row2]
+                col_widths = [doc_width/2, doc_width/2]
+            else:
+                table_data = [[o] for o in opt_paras]
+                col_widths = [doc_width]
+
+            if table_data:
+                t = Table(table_data, colWidths=col_widths)
+                t.setStyle(ctx.options_table_style)
+                story.append(t)
+            story.append(Spacer(1, 0.3*cm))
+
+    else: # KEY
+        data = []; row = []
+        lbls = ["A", "B", "C", "D"]
+        for q in questions:
+            idx = q.get('correct_answer_index', -1)
+            ans = lbls[idx] if idx != -1 else "?"
+            row.append(f"{q['display_id']}: {ans}")
+            if len(row) == 5: data.append(row); row = []
+        if row: 
+            while len(row) < 5: row.append("")
+            data.append(row)
+        
+        if data:
+            t = Table(data, colWidths=[2.5*cm]*5, rowHeights=0.8*cm)
+            t.setStyle(ctx.key_table_style)
+            story.append(t)
+
+    # --- HÀM BUILD ĐẶC BIỆT ĐỂ TẠO BOOKMARK ---
+    def add_bookmarks(canvas, doc):
+        """Hàm callback để vẽ bookmark lên từng trang"""
+        canvas.saveState()
+        # Vì SimpleDocTemplate khó biết chính xác vị trí Y của từng câu trong flow
+        # Nên ở đây ta tạo bookmark giả lập theo trang hoặc thêm logic phức tạp hơn.
+        # Để đơn giản và hiệu quả: Ta chỉ bookmark trang đầu hoặc các mục lớn.
+        # Mở rộng: Muốn bookmark từng câu chính xác cần dùng Paragraph(..., destination='...')
+        canvas.restoreState()
+
+    # Lưu ý: Với SimpleDocTemplate, việc tạo Bookmark trỏ đúng từng câu khá phức tạp
+    # Dưới đây là cách hack để tạo bookmark mỗi khi gặp một Flowable nhất định (nâng cao)
+    # Trong phạm vi code này, ta sẽ build bình thường, font và layout đã chuẩn.
+    
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
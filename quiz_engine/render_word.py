@@ -0,0 +1,150 @@
+import io
+
+from docx import Document
+from docx.shared import Pt, Cm, Inches, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+
+# ==========================================
+# 1. HELPER THỤT ĐẦU DÒNG
+# ==========================================
+def fix_indent_word(text):
+    """
+    Chuyển đổi các khoảng trắng đầu dòng thành Non-breaking space (\u00A0)
+    để Word bắt buộc phải hiển thị, không được tự động co lại.
+    """
+    if not text: return ""
+    lines = text.split('\n')
+    processed_lines = []
+    
+    for line in lines:
+        # Tách phần nội dung và phần khoảng trắng đầu dòng
+        stripped_content = line.lstrip()
+        num_spaces = len(line) - len(stripped_content)
+        
+        if num_spaces > 0:
+            # Thay thế bằng \u00A0 (Non-breaking space)
+            # Ký tự này trong Word có độ rộng cố định và không bị xóa
+            indent_str = "\u00A0" * num_spaces
+            processed_lines.append(indent_str + stripped_content)
+        else:
+            processed_lines.append(line)
+            
+    return '\n'.join(processed_lines)
+
+# ==========================================
+# 2. TẠO WORD (CHUẨN VIỆT NAM + HEADING, ĐÃ SỬA LỖI MẤT KHOẢNG TRẮNG)
+# ==========================================
+
+def generate_word_bytes(questions, mode="exam"):
+    buffer = io.BytesIO()
+    doc = Document()
+    
+    # 1. Cấu hình trang chuẩn
+    section = doc.sections[0]
+    section.page_width = Cm(21)
+    section.page_height = Cm(29.7)
+    section.left_margin = Cm(3)
+    section.right_margin = Cm(2)
+    section.top_margin = Cm(2)
+    section.bottom_margin = Cm(2)
+
+    def set_font(run, bold=False, size=13):
+        run.font.name = 'Times New Roman'
+        run.font.size = Pt(size)
+        run.font.bold = bold
+        run.font.color.rgb = RGBColor(0, 0, 0)
+        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+
+    # 2. Header
+    h_table = doc.add_table(rows=1, cols=2)
+    h_table.autofit = False
+    h_table.columns[0].width = Cm(9)
+    h_table.columns[1].width = Cm(7)
+    
+    c1 = h_table.cell(0, 0)
+    p1 = c1.paragraphs[0]
+    p1.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    r1 = p1.add_run("SỞ GD&ĐT ........................\nTRƯỜNG THPT ........................")
+    set_font(r1, bold=True, size=11)
+    
+    c2 = h_table.cell(0, 1)
+    p2 = c2.paragraphs[0]
+    p2.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_str = "ĐỀ THI TRẮC NGHIỆM" if mode == "exam" else "ĐÁP ÁN"
+    r2 = p2.add_run(f"{title_str}\nMÔN: TIN HỌC")
+    set_font(r2, bold=True, size=12)
+
+    p_line = doc.add_paragraph()
+    p_line.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    r_line = p_line.add_run("____________________________________")
+    set_font(r_line, bold=True)
+    doc.add_paragraph() 
+
+    if mode == "exam":
+        labels = ["A.", "B.", "C.", "D."]
+        for q in questions:
+            # --- HEADING CÂU HỎI ---
+            heading = doc.add_heading(level=2)
+            heading.paragraph_format.space_before = Pt(6)
+            heading.paragraph_format.space_after = Pt(6)
+            heading.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            
+            r_num = heading.add_run(f"Câu {q['display_id']}: ")
+            set_font(r_num, bold=True, size=13)
+            
+            # --- QUAN TRỌNG: GỌI HÀM SỬA LỖI THỤT DÒNG ---
+            # Xử lý text câu hỏi trước khi đưa vào Word
+            clean_question_text = fix_indent_word(q['question'])
+            
+            r_content = heading.add_run(clean_question_text)
+            set_font(r_content, bold=False, size=13)
+
+            # --- ĐÁP ÁN ---
+            opts = q.get('options', [])
+            clean_opts = [str(o) for o in opts]
+            max_len = max([len(o) for o in clean_opts]) if clean_opts else 0
+
+            if len(clean_opts) == 4 and max_len < 40:
+                table = doc.add_table(rows=2, cols=2)
+                table.autofit = True
+                map_pos = [(0,0), (1,0), (0,1), (1,1)]
+                for i in range(4):
+                    r_idx, c_idx = map_pos[i]
+                    cell = table.cell(r_idx, c_idx)
+                    p_opt = cell.paragraphs[0]
+                    # Cũng sửa thụt dòng cho đáp án (phòng hờ)
+                    fixed_opt = fix_indent_word(clean_opts[i])
+                    run_opt = p_opt.add_run(f"{labels[i]} {fixed_opt}")
+                    set_font(run_opt, size=13)
+            else:
+                table = doc.add_table(rows=len(clean_opts), cols=1)
+                for i, txt in enumerate(clean_opts):
+                    cell = table.cell(i, 0)
+                    p_opt = cell.paragraphs[0]
+                    fixed_opt = fix_indent_word(txt)
+                    run_opt = p_opt.add_run(f"{labels[i]} {fixed_opt}")
+                    set_font(run_opt, size=13)
+            
+            doc.add_paragraph() 
+
+    else: # KEY (Giữ nguyên)
+        table = doc.add_table(rows=1, cols=5)
+        table.style = 'Table Grid'
+        curr_row = table.rows[0]
+        c_count = 0
+        lbls = ["A", "B", "C", "D"]
+        for q in questions:
+            idx = q.get('correct_answer_index', -1)
+            ans = lbls[idx] if idx != -1 else "?"
+            cell = curr_row.cells[c_count]
+            p = cell.paragraphs[0]
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            run = p.add_run(f"{q['display_id']}: {ans}")
+            set_font(run, bold=True, size=13)
+            c_count += 1
+            if c_count >= 5: c_count = 0; curr_row = table.add_row()
+
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,48 @@
+from quiz_engine.lines import join_lines
+from quiz_engine.parser import iter_questions_from_records
+from quiz_engine.pdf_extract import iter_pdf_lines
+
+
+class PdfQuizStream:
+    """
+    PDF -> câu hỏi theo luồng, không chờ hết tài liệu:
+
+        stream = PdfQuizStream(f, workers=0)
+        for q in stream:                  # câu X có ngay khi "Câu X+1" xuất hiện
+            ... stream.pages_done, stream.page_count
+        stream.raw_text, stream.img_map   # sau khi duyệt hết = process_pdf_v18(f)
+
+    stream.records: [LineRecord] mọi dòng đã đọc (có số trang, tọa độ).
+    keep_text=False: không giữ lại các dòng (raw_text rỗng), bộ nhớ chỉ còn câu đang mở + ảnh.
+    low_memory, profile: xem process_pdf_v18.
+    """
+
+    def __init__(self, file_stream, workers=None, use_numpy=None, keep_text=True, low_memory=False,
+                 profile=None):
+        self.file_stream = file_stream
+        self.workers = workers
+        self.use_numpy = use_numpy
+        self.low_memory = low_memory
+        self.profile = profile
+        self.img_map = {}
+        self.pages_done = 0
+        self.page_stats = []  # thống kê gán ảnh từng trang
+        self.page_count = 0
+        self.records = [] if keep_text else None
+
+    def _on_page(self, done, total):
+        self.pages_done, self.page_count = done, total
+
+    def _iter_records(self):
+        for rec in iter_pdf_lines(self.file_stream, self.img_map, self.workers, self.use_numpy,
+                                  self._on_page, self.page_stats, self.low_memory, self.profile):
+            if self.records is not None:
+                self.records.append(rec)
+            yield rec
+
+    def __iter__(self):
+        return iter_questions_from_records(self._iter_records(), self.img_map)
+
+    @property
+    def raw_text(self):
+        return join_lines(self.records) if self.records else ""
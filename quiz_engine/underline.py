@@ -0,0 +1,29 @@
+from bisect import bisect_left, bisect_right
+
+# Gạch chân phải nằm dưới tâm chữ và cách chân chữ không quá 12px
+UNDERLINE_MAX_GAP = 12
+
+class UnderlineIndex:
+    """
+    Chỉ mục các đường kẻ ngang ứng viên (gạch chân) của 1 trang, sort theo y0.
+    Dựng 1 lần/trang; mỗi từ chỉ xét các đường nằm trong dải dọc của nó
+    (bisect) thay vì duyệt toàn bộ drawings.
+    lines: list [x0, y0, x1, y1] (hoặc tuple)
+    """
+    __slots__ = ("_lines", "_ys")
+
+    def __init__(self, lines):
+        self._lines = sorted(lines, key=lambda l: l[1])
+        self._ys = [l[1] for l in self._lines]
+
+    def __len__(self):
+        return len(self._lines)
+
+    def candidates(self, word_rect):
+        """Các đường có w_center_y < y0 < w_bottom + 12"""
+        _, wy0, _, wy1 = word_rect
+        lo = bisect_right(self._ys, (wy0 + wy1) / 2)
+        hi = bisect_left(self._ys, wy1 + UNDERLINE_MAX_GAP)
+        lines = self._lines
+        for i in range(lo, hi):
+            yield lines[i]
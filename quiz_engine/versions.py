@@ -0,0 +1,201 @@
+"""
+Tạo hàng loạt mã đề từ 1 ngân hàng câu hỏi: mỗi mã đề trộn với seed riêng, xuất đề + đáp án
+(PDF + Word), chạy song song trên nhiều process. Kết quả gom vào 1 file ZIP.
+"""
+import csv
+import io
+import json
+import os
+import random
+import threading
+import zipfile
+from collections import OrderedDict
+
+from quiz_engine.cache import content_key
+from quiz_engine.mixer import mix_exam
+
+# Tăng khi đổi logic trộn/xuất file -> cache file xuất cũ tự mất hiệu lực
+RENDER_VERSION = "r1"
+
+# Mã đề đầu tiên (101, 102, ... như đề thi thật)
+FIRST_CODE = 101
+LABELS = "ABCD"
+# Tên file trong ZIP -> (định dạng, chế độ)
+VERSION_FILES = {
+    "De_Thi.pdf": ("pdf", "exam"),
+    "Dap_An.pdf": ("pdf", "key"),
+    "De_Thi.docx": ("docx", "exam"),
+    "Dap_An.docx": ("docx", "key"),
+}
+
+_bank = None
+
+
+def _init_worker(questions):
+    """Mỗi worker nhận ngân hàng câu hỏi 1 lần (không gửi lại theo từng mã đề)"""
+    global _bank
+    _bank = questions
+
+
+def bank_key(questions):
+    """Mã băm ngân hàng câu hỏi (thứ tự khóa cố định -> cùng nội dung = cùng mã)"""
+    data = json.dumps(questions, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return content_key(data, RENDER_VERSION, "bank")
+
+
+def version_key(bank, seed, options):
+    """Khóa 1 đề đã trộn: cùng ngân hàng + seed + cấu hình trộn -> cùng đề, cùng file xuất"""
+    data = json.dumps({"seed": seed, "options": options}, sort_keys=True).encode("utf-8")
+    return content_key(data, RENDER_VERSION, bank)
+
+
+def render_document(mixed, fmt, mode):
+    """Xuất 1 file (fmt: "pdf" | "docx", mode: "exam" | "key") -> bytes"""
+    # Import muộn: reportlab/python-docx chỉ nạp trong process thật sự xuất file
+    if fmt == "pdf":
+        from quiz_engine.render_pdf import generate_pdf_bytes
+        return generate_pdf_bytes(mixed, mode).getvalue()
+    from quiz_engine.render_word import generate_word_bytes
+    return generate_word_bytes(mixed, mode).getvalue()
+
+
+def render_cached(cache, vkey, mixed, fmt, mode):
+    """
+    Như render_document nhưng đọc/ghi cache đĩa (RenderCache) theo khóa đề vkey.
+    mixed có thể là hàm không tham số -> chỉ trộn đề khi cache trượt.
+    """
+    key = f"{vkey}-{mode}-{fmt}"
+    data = cache.get(key) if cache is not None else None
+    if data is None:
+        data = render_document(mixed() if callable(mixed) else mixed, fmt, mode)
+        if cache is not None:
+            try: cache.put(key, data)
+            except OSError: pass  # cache chỉ để tăng tốc, ghi lỗi không ảnh hưởng kết quả
+    return data
+
+
+class DocumentStore:
+    """
+    File đã xuất trong RAM, khóa (khóa đề, định dạng, chế độ); giữ tối đa max_items file (LRU),
+    trượt thì lấy từ RenderCache trên đĩa rồi mới xuất thật.
+    An toàn khi gọi từ nhiều thread (download_button chạy callable ở thread riêng);
+    cùng 1 file đang xuất thì các lượt gọi khác chờ, không xuất trùng.
+    """
+
+    def __init__(self, disk_cache=None, max_items=16):
+        self.disk_cache = disk_cache
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, vkey, mixed, fmt, mode):
+        key = (vkey, fmt, mode)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._items:
+                    return self._items[key]
+            try:
+                data = render_cached(self.disk_cache, vkey, mixed, fmt, mode)
+                with self._lock:
+                    self._items[key] = data
+                    while len(self._items) > self.max_items:
+                        self._items.popitem(last=False)
+            finally:
+                # Xuất lỗi cũng bỏ khóa chờ -> lượt bấm tải sau xuất lại từ đầu
+                with self._lock:
+                    self._pending.pop(key, None)
+        return data
+
+    def zip_bytes(self, vkey, mixed, fmt, names):
+        """ZIP gồm các file {tên: chế độ} cùng định dạng (vd đề + đáp án)"""
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, mode in names.items():
+                zf.writestr(name, self.get(vkey, mixed, fmt, mode))
+        return buf.getvalue()
+
+
+def render_version(questions, code, seed, shuffle_q=True, shuffle_o=True, balance=True, cache=None, bank=None):
+    """
+    Trộn + xuất 1 mã đề. Trả về dict:
+      code, seed, options, answers (list chữ cái theo thứ tự câu trong đề), files {tên file: bytes}
+    cache: RenderCache (tùy chọn) - file đã xuất với cùng (ngân hàng, seed, cấu hình) lấy lại từ đĩa.
+    bank: bank_key(questions) tính sẵn (tránh băm lại cho từng mã đề).
+    """
+    options = {"shuffle_questions": shuffle_q, "shuffle_options": shuffle_o, "balance_distribution": balance}
+    # View trên ngân hàng câu hỏi (không copy) - renderer đọc thẳng qua view
+    mixed = mix_exam(questions, shuffle_q, shuffle_o, balance, seed=seed)
+    if cache is None:
+        files = {name: render_document(mixed, fmt, mode) for name, (fmt, mode) in VERSION_FILES.items()}
+    else:
+        vkey = version_key(bank or bank_key(questions), seed, options)
+        files = {name: render_cached(cache, vkey, mixed, fmt, mode) for name, (fmt, mode) in VERSION_FILES.items()}
+    answers = [LABELS[q['correct_answer_index']] if q.get('correct_answer_index', -1) != -1 else "?"
+               for q in mixed]
+    return {"code": code, "seed": seed, "options": options, "answers": answers, "files": files}
+
+
+def _render_task(task):
+    return render_version(_bank, *task)
+
+
+def answer_matrix_csv(versions):
+    """Bảng đáp án tổng hợp: mỗi dòng 1 câu, mỗi cột 1 mã đề (utf-8-sig để Excel đọc đúng tiếng Việt)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Câu"] + [v["code"] for v in versions])
+    n_rows = max((len(v["answers"]) for v in versions), default=0)
+    for i in range(n_rows):
+        writer.writerow([i + 1] + [v["answers"][i] if i < len(v["answers"]) else "" for v in versions])
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def new_seed():
+    """Seed ngẫu nhiên cho đề mới (lưu lại để tạo lại đúng đề)"""
+    return random.SystemRandom().randrange(2**32)
+
+
+def generate_versions(questions, n_versions, seed=None, shuffle_q=True, shuffle_o=True, balance=True,
+                      workers=None, first_code=FIRST_CODE, cache=None):
+    """
+    Tạo n_versions mã đề, trả về list kết quả render_version (theo thứ tự mã đề).
+    seed: seed gốc (None = ngẫu nhiên); mã đề thứ i dùng seed + i -> tạo lại được đúng đề cũ.
+    workers: số process (None = số CPU, 1 = chạy tuần tự trong process hiện tại).
+    cache: RenderCache (tùy chọn) - mã đề đã xuất trước đó lấy thẳng từ đĩa.
+    """
+    if seed is None:
+        seed = new_seed()
+    bank = bank_key(questions) if cache is not None else None
+    tasks = [(first_code + i, seed + i, shuffle_q, shuffle_o, balance, cache, bank) for i in range(n_versions)]
+
+    workers = min(workers or os.cpu_count() or 1, n_versions)
+    if workers <= 1:
+        return [render_version(questions, *task) for task in tasks]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(questions,)) as pool:
+        return list(pool.map(_render_task, tasks))
+
+
+def versions_zip(versions):
+    """
+    ZIP gồm: <mã đề>/De_Thi.pdf, Dap_An.pdf, De_Thi.docx, Dap_An.docx,
+    Bang_dap_an.csv (ma trận đáp án) và versions.json (seed từng mã đề để tạo lại).
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for v in versions:
+            for name, data in v["files"].items():
+                # PDF (reportlab nén sẵn) và DOCX (vốn là ZIP) -> không nén lại
+                zf.writestr(f"{v['code']}/{name}", data, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("Bang_dap_an.csv", answer_matrix_csv(versions))
+        meta = [{"code": v["code"], "seed": v["seed"], "options": v["options"]} for v in versions]
+        zf.writestr("versions.json", json.dumps(meta, ensure_ascii=False, indent=2))
+    buf.seek(0)
+    return buf
@@ -1,130 +1,172 @@
+"""
+JSON đề thi -> PDF qua HTML (template/index.jinja2) + Chromium.
+
+Chạy từ root:
+    python taode2.py                                    # hộp thoại chọn file (cần màn hình)
+    python taode2.py de/*.json -o pdf_out -j 4          # không giao diện (server Linux)
+    python taode2.py "quiz_out/**/quiz_data.json" -o pdf_out   # nối tiếp sau python -m quiz_engine
+"""
+import argparse
 import json
 import os
 import sys
-import subprocess
-import sys
-import tkinter as tk
-from tkinter import filedialog
-from jinja2 import Environment, FileSystemLoader
-from playwright.sync_api import sync_playwright
-
-# Config chung
-base_dir = os.path.dirname(os.path.abspath(__file__))
-template_dir = os.path.join(base_dir, "template")
-html_template_name = "index.jinja2"
-# --- CẤU HÌNH GIAO DIỆN CHUẨN WORD (CSS) ---
+import time
 
+from quiz_engine.batch import PROFILE_NAME, STAMP_NAME, find_inputs, unique_out_paths
+from quiz_engine.html_pdf import DEFAULT_PAGES, HtmlPdfRenderer, asset_url, throughput_per_minute
+from quiz_engine.html_template import HtmlRenderContext
 
-env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
-t = env.get_template(html_template_name)
+# --- CẤU HÌNH GIAO DIỆN CHUẨN WORD (CSS): template/index.jinja2 + style.css ---
+# Template biên dịch 1 lần (bytecode cache trên đĩa), data URI ảnh nhớ theo nội dung
+render_ctx = HtmlRenderContext()
 
-def select_file():
-    """Mở hộp thoại chọn file JSON"""
+def select_files():
+    """Mở hộp thoại chọn 1 hoặc nhiều file JSON (Cancel = dừng)"""
+    # Import muộn: chế độ dòng lệnh chạy được trên máy không có tkinter / màn hình
+    import tkinter as tk
+    from tkinter import filedialog
     root = tk.Tk()
     root.withdraw()
-    file_path = filedialog.askopenfilename(
-        title="Chọn file JSON đề thi",
+    file_paths = filedialog.askopenfilenames(
+        title="Chọn file JSON đề thi (chọn được nhiều file)",
         filetypes=[("JSON Files", "*.json")]
     )
-    return file_path
-
-def main():
-    # 1. Chọn file
-    print(">>> Đang mở hộp thoại chọn file...")
-    json_path = select_file()
-    
-    if not json_path:
-        print(">>> Hủy bỏ: Chưa chọn file.")
-        return
+    root.destroy()
+    return list(file_paths)
 
+def prepare_job(json_path, output_pdf_path=None, inline_images=False):
+    """
+    Đọc JSON + render HTML trong bộ nhớ. Trả về (html, pdf_path, assets) hoặc None nếu lỗi
+    (đọc/parse hỏng, không phải list câu hỏi, lỗi render) - đã in thông báo.
+    assets: {tên ảnh: đường dẫn ảnh cạnh file JSON} - trình duyệt lấy ảnh qua map này.
+    output_pdf_path: mặc định <tên>.pdf cạnh file JSON.
+    inline_images: nhúng ảnh thẳng vào HTML (data URI, mỗi ảnh mã hóa 1 lần cho mọi đề).
+    """
     base_dir = os.path.dirname(json_path) # Thư mục chứa file json
-    file_name_no_ext = os.path.splitext(os.path.basename(json_path))[0]
-    output_pdf_path = os.path.join(base_dir, f"{file_name_no_ext}.pdf")
+    if output_pdf_path is None:
+        file_name_no_ext = os.path.splitext(os.path.basename(json_path))[0]
+        output_pdf_path = os.path.join(base_dir, f"{file_name_no_ext}.pdf")
 
-    # 2. Đọc dữ liệu
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        return _build_job(json_path, base_dir, output_pdf_path, inline_images)
     except Exception as e:
-        print(f"Lỗi đọc file JSON: {e}")
-        return
+        # Lỗi 1 file (JSON hỏng, sai cấu trúc, lỗi template) không làm dừng cả lượt in
+        print(f"Lỗi xử lý file JSON {json_path}: {type(e).__name__}: {e}")
+        return None
+
+def _build_job(json_path, base_dir, output_pdf_path, inline_images):
+    # 1. Đọc dữ liệu: đề thi là list câu hỏi (dict); file JSON khác thì bỏ qua
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise ValueError("không phải danh sách câu hỏi (list các object)")
 
-    # 3. Xử lý đường dẫn ảnh
+    # 2. Xử lý đường dẫn ảnh: HTML trỏ tới URL ảo, ảnh thật lấy từ thư mục chứa JSON
+    assets = {}
     for item in data:
-        # Tạo một list mới trong item để chứa các đường dẫn tuyệt đối
-        item["image_abspaths"] = [] 
-        
         # Lấy list ảnh gốc ra (nếu không có thì trả về list rỗng [])
         raw_images_list = item.get("images", [])
-        
-        # Nếu có ảnh (list không rỗng)
-        if raw_images_list:
-            for img_name in raw_images_list:
-                # Ghép đường dẫn cho TỪNG ảnh
-                abs_path = os.path.join(base_dir, img_name)
-                
-                # Sửa dấu \ thành / và thêm vào list kết quả
-                clean_path = abs_path.replace("\\", "/")
-                item["image_abspaths"].append(clean_path)
-
-    # 4. Render HTML trong bộ nhớ (không cần lưu file html ra đĩa)
-    print(">>> Đang tạo giao diện chuẩn Word...")
-    html_content = t.render(questions=data)
-
-    output_html_path = os.path.join(base_dir, f"{file_name_no_ext}.html")
-    with open(output_html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    # 5. Xuất ra PDF bằng Playwright
-    print(">>> Đang in ra PDF (Vui lòng đợi vài giây)...")
-    try:
-        with sync_playwright() as p:
-            # Mở trình duyệt ẩn
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            
-            # Load nội dung HTM
-            page.goto(f"file:///{output_html_path}")
-            
-            # Lệnh "Thần thánh": Chờ cho đến khi mạng rảnh (tức là ảnh đã load xong)
-            page.wait_for_load_state("networkidle")
-            
-            # Cấu hình xuất PDF
-            page.pdf(
-                path=output_pdf_path,
-                format="A4",
-                print_background=True, # In cả màu nền (nếu có)
-                margin={ # Lề giấy (ghi đè CSS nếu cần, nhưng CSS @page mạnh hơn)
-                    "top": "0cm", # Để 0 vì đã chỉnh trong CSS @page
-                    "bottom": "0cm",
-                    "left": "0cm",
-                    "right": "0cm"
-                }
-            )
-            browser.close()
-            
-        print("-" * 40)
-        print(f"✅ XONG! File PDF đã được tạo tại:")
-        print(output_pdf_path)
-        
-        # Tự động mở file (Windows)
-        os.startfile(output_pdf_path)
-        
-    except Exception as e:
-        print(f"❌ Lỗi khi xuất PDF: {e}")
+        if inline_images:
+            uris = (render_ctx.data_uri(os.path.join(base_dir, img_name)) for img_name in raw_images_list)
+            item["image_abspaths"] = [uri for uri in uris if uri]
+            continue
+        item["image_abspaths"] = [asset_url(img_name) for img_name in raw_images_list]
+        for img_name in raw_images_list:
+            assets[img_name] = os.path.join(base_dir, img_name)
+
+    # 3. Render HTML trong bộ nhớ (không cần lưu file html ra đĩa)
+    html_content = render_ctx.render(data)
+    return html_content, output_pdf_path, assets
+
+def render_batch(renderer, json_paths, pdf_paths=None, inline_images=False):
+    """
+    In nhiều file JSON ra PDF trên trình duyệt đang mở, in thông lượng (đề/phút).
+    pdf_paths: đường dẫn PDF tương ứng (mặc định cạnh file JSON).
+    """
+    t0 = time.perf_counter()
+    print(f">>> Đang tạo giao diện chuẩn Word cho {len(json_paths)} file...")
+    pdf_paths = pdf_paths or [None] * len(json_paths)
+    jobs = [prepare_job(json_path, pdf_path, inline_images) for json_path, pdf_path in zip(json_paths, pdf_paths)]
+    jobs = [job for job in jobs if job]
 
+    print(">>> Đang in ra PDF...")
+    results = renderer.render(jobs)
+    elapsed = time.perf_counter() - t0
+
+    done = [r for r in results if not r["error"]]
+    print("-" * 40)
+    for r in results:
+        if r["error"]:
+            print(f"❌ {r['pdf']}: {r['error']}")
+        else:
+            print(f"✅ {r['pdf']} ({r['seconds']:.2f}s)")
+    print(f">>> {len(done)}/{len(json_paths)} file trong {elapsed:.2f}s "
+          f"= {throughput_per_minute(len(done), elapsed):.1f} đề/phút")
+    return done
+
+def collect_pdf_jobs(inputs, out_root=None):
+    """
+    inputs: thư mục / file / glob JSON. Trả về (json_paths, pdf_paths).
+    out_root: None = PDF cạnh file JSON; có = giữ cấu trúc thư mục tương đối trong out_root
+    (nhiều input trùng tên tương đối -> thêm tên thư mục gốc, xem unique_out_paths).
+    Bỏ qua file phụ của python -m quiz_engine (.source.json, profile.json).
+    """
+    items = [(path, base, os.path.relpath(os.path.splitext(path)[0], base) + ".pdf")
+             for path, base in find_inputs(inputs, (".json",))
+             if os.path.basename(path) not in (STAMP_NAME, PROFILE_NAME)]
+    json_paths = [path for path, _, _ in items]
+    if out_root is None:
+        return json_paths, [os.path.splitext(path)[0] + ".pdf" for path in json_paths]
+    return json_paths, unique_out_paths(items, out_root)
+
+def run_interactive(pages):
+    # Trình duyệt khởi động 1 lần, dùng lại cho mọi lượt chọn file (Cancel để thoát)
+    print(">>> Đang khởi động trình duyệt...")
+    with HtmlPdfRenderer(pages=pages) as renderer:
+        while True:
+            print(">>> Đang mở hộp thoại chọn file...")
+            json_paths = select_files()
+            if not json_paths:
+                print(">>> Kết thúc: Không chọn thêm file.")
+                return 0
+
+            done = render_batch(renderer, json_paths)
+
+            # Tự động mở file khi chỉ in 1 file (os.startfile chỉ có trên Windows)
+            if len(done) == 1 and hasattr(os, "startfile"):
+                os.startfile(done[0]["pdf"])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python taode2.py", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="*",
+                    help="thư mục, file .json hoặc glob (vd 'quiz_out/**/quiz_data.json'); bỏ trống = hộp thoại")
+    ap.add_argument("-o", "--out", help="thư mục PDF kết quả (mặc định: cạnh file JSON)")
+    ap.add_argument("-j", "--pages", type=int, default=DEFAULT_PAGES,
+                    help=f"số tab in song song (mặc định: {DEFAULT_PAGES})")
+    ap.add_argument("--inline-images", action="store_true",
+                    help="nhúng ảnh vào HTML dạng data URI (mỗi ảnh mã hóa 1 lần, dùng lại cho mọi đề)")
+    args = ap.parse_args(argv)
+
+    if not args.inputs:
+        return run_interactive(args.pages)
 
-def ensure_browsers_installed():
-    """Tự động cài Chromium nếu chưa có"""
-    print(">>> Đang kiểm tra môi trường Playwright...")
     try:
-        # Thử chạy lệnh kiểm tra xem trình duyệt có chưa (hoặc chạy lệnh install luôn cho chắc)
-        # Lệnh này sẽ cài chromium nếu thiếu, nếu có rồi thì nó bỏ qua rất nhanh
-        subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
-        print(">>> Môi trường Playwright đã sẵn sàng!")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Lỗi khi cài đặt trình duyệt: {e}")
-        sys.exit(1)
+        json_paths, pdf_paths = collect_pdf_jobs(args.inputs, args.out)
+    except ValueError as e:
+        print(f">>> Lỗi: {e}")
+        return 2
+    if not json_paths:
+        print(">>> Không tìm thấy file .json nào.")
+        return 1
+    for pdf_path in pdf_paths:
+        os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+
+    print(f">>> {len(json_paths)} file, {args.pages} tab -> {args.out or 'cạnh file JSON'}")
+    with HtmlPdfRenderer(pages=args.pages) as renderer:
+        done = render_batch(renderer, json_paths, pdf_paths, args.inline_images)
+    return 0 if len(done) == len(json_paths) else 1
+
 
 if __name__ == "__main__":
-    ensure_browsers_installed()
-    main()
\ No newline at end of file
+    sys.exit(main())
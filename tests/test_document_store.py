@@ -0,0 +1,27 @@
+"""Chạy từ root: python -m pytest -q"""
+import pytest
+
+from quiz_engine import versions
+from quiz_engine.versions import DocumentStore
+
+
+def test_get_retries_after_render_error(monkeypatch):
+    calls = []
+
+    def flaky_render(cache, vkey, mixed, fmt, mode):
+        calls.append((vkey, fmt, mode))
+        if len(calls) == 1:
+            raise RuntimeError("render lỗi")
+        return b"%PDF-ok"
+
+    monkeypatch.setattr(versions, "render_cached", flaky_render)
+    store = DocumentStore()
+
+    with pytest.raises(RuntimeError):
+        store.get("v1", [], "pdf", "exam")
+    assert store._pending == {}
+
+    assert store.get("v1", [], "pdf", "exam") == b"%PDF-ok"
+    assert store.get("v1", [], "pdf", "exam") == b"%PDF-ok"  # lần 3 lấy từ RAM
+    assert len(calls) == 2
+    assert store._pending == {}
@@ -0,0 +1,46 @@
+"""Chạy từ root: python -m pytest -q"""
+import os
+
+import pytest
+
+from quiz_engine.batch import collect_jobs
+from taode2 import collect_pdf_jobs
+
+
+def _touch(root, *rels):
+    for rel in rels:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("[]", encoding="utf-8")
+
+
+def test_collect_pdf_jobs_same_relative_name_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _touch(tmp_path, "out/a/de1/quiz_data.json", "out/b/de1/quiz_data.json")
+    _, pdfs = collect_pdf_jobs(["out/a/de1/quiz_data.json", "out/b/de1/quiz_data.json"], "pdf")
+    assert pdfs == [os.path.join("pdf", "a", "de1", "quiz_data.pdf"), os.path.join("pdf", "b", "de1", "quiz_data.pdf")]
+
+
+def test_collect_pdf_jobs_same_relative_name_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _touch(tmp_path, "out/a/de1/quiz_data.json", "out/b/de1/quiz_data.json", "out/b/de2/quiz_data.json")
+    _, pdfs = collect_pdf_jobs(["out/a", "out/b"], "pdf")
+    assert pdfs == [os.path.join("pdf", "a", "de1", "quiz_data.pdf"),
+                    os.path.join("pdf", "b", "de1", "quiz_data.pdf"),
+                    os.path.join("pdf", "de2", "quiz_data.pdf")]
+
+
+def test_collect_jobs_same_relative_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _touch(tmp_path, "x/HK1/de1.pdf", "y/HK1/de1.pdf", "in/HK2/de1.pdf")
+    out_dirs = [out for _, out in collect_jobs(["x/HK1", "y/HK1", "in/HK2"], "out")]
+    assert out_dirs == [os.path.join("out", "x", "HK1", "de1"), os.path.join("out", "y", "HK1", "de1"),
+                        os.path.join("out", "in", "HK2", "de1")]
+
+
+def test_collect_jobs_collision_with_prefixed_path_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # a/HK1/de1.pdf -> out/HK1/de1, trùng với c/HK1/de1.pdf (giữ cấu trúc dưới c)
+    _touch(tmp_path, "a/HK1/de1.pdf", "b/HK2/de1.pdf", "c/HK1/de1.pdf")
+    with pytest.raises(ValueError):
+        collect_jobs(["a/HK1", "b/HK2", "c"], "out")